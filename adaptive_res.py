@@ -0,0 +1,190 @@
+"""
+Adaptive Resolution (Unit 6 live loops under load)
+- Overview: Hold a per-frame latency budget by moving the per-pixel work (masks, features) up and down an image pyramid -- full, 1/2, 1/4 scale -- from measured frame and stage times, with hysteresis and a cooldown so it doesn't flip-flop; masks and coordinates are mapped back to full resolution.
+- Inputs: A target frame latency in ms; per frame, the measured frame latency (your own work, not the wait for the camera) and the time of the stages that run at the reduced scale. $CV_ADAPTIVE_LOG (a .csv path) logs every frame's latency and level.
+- Usage: `ctl = adaptive_res.AdaptiveResolution(budget_ms=33)`; per frame `small = ctl.down(frame)`, work on `small`,
+    `mask = ctl.up_mask(small_mask, frame.shape)`, then `ctl.record(frame_ms, scaled_ms)`. Run `python adaptive_res.py` for a simulated load spike.
+"""
+
+import collections
+import csv
+import os
+import time
+
+import cv2
+import numpy as np
+
+from latency import Histogram
+
+DEFAULT_LOG = os.environ.get('CV_ADAPTIVE_LOG')
+
+
+class AdaptiveResolution:
+  def __init__(self, budget_ms=33.0, max_level=2, window=15, headroom=0.75, cooldown=30, log_path=DEFAULT_LOG):
+    self.budget_ms = budget_ms
+    self.max_level = max_level # 2: down to 1/4 scale
+    self.window = window # frames per decision
+    self.headroom = headroom # go finer only if the prediction fits in this fraction of the budget
+    self.cooldown = cooldown # frames after a switch before the next decision
+    self.level = 0
+    self.switches = 0
+    self.frames = 0
+    self.hists = collections.defaultdict(Histogram) # level -> frame latency
+    self._recent = collections.deque(maxlen=window) # (frame_ms, scaled_ms, overhead_ms)
+    self._overhead = 0.0 # ms spent in down()/up_*() since the last record()
+    self._pyr = {} # (input shape, level) -> pyrDown destination, reused frame to frame
+    self._hold = 0
+    self._log = None
+    self._log_path = log_path
+
+  @property
+  def scale(self):
+    return 1 / (1 << self.level)
+
+  def down(self, img):
+    """`img` at the current level (the image itself at level 0); valid until the next `down()`."""
+    t0 = time.perf_counter()
+    shape = img.shape
+    for level in range(1, self.level + 1):
+      h, w = img.shape[:2]
+      key = (shape, level)
+      if key not in self._pyr:
+        self._pyr[key] = np.empty(((h + 1) // 2, (w + 1) // 2) + img.shape[2:], img.dtype)
+      img = cv2.pyrDown(img, dst=self._pyr[key])
+    self._overhead += (time.perf_counter() - t0) * 1e3
+    return img
+
+  def up_mask(self, mask, shape, dst=None):
+    """Nearest-neighbour upsample of a mask computed on `down(frame)` back to `frame.shape` (into `dst` if given)."""
+    if mask.shape[:2] == tuple(shape[:2]):
+      return mask
+    t0 = time.perf_counter()
+    mask = cv2.resize(mask, (shape[1], shape[0]), dst=dst, interpolation=cv2.INTER_NEAREST)
+    self._overhead += (time.perf_counter() - t0) * 1e3
+    return mask
+
+  def up_points(self, pts):
+    """(x, y) coordinates on `down(frame)` -> full resolution; pyrDown keeps every 2nd pixel per level."""
+    return np.asarray(pts, np.float64) * (1 << self.level)
+
+  def record(self, frame_ms, scaled_ms, overhead_ms=None):
+    """Feed one frame's latency and the part of it spent at the reduced scale; returns the level for the next frame.
+
+    overhead_ms: time spent moving between levels (pyrDown, upsampling). By default, what
+    `down`/`up_mask` measured themselves since the last call.
+    """
+    if overhead_ms is None:
+      overhead_ms = self._overhead
+    self._overhead = 0.0
+    self.frames += 1
+    self.hists[self.level].record(frame_ms / 1e3)
+    self._write(frame_ms, scaled_ms)
+    self._recent.append((frame_ms, scaled_ms, overhead_ms))
+    if self._hold > 0:
+      self._hold -= 1
+      return self.level
+    if len(self._recent) < self.window:
+      return self.level
+    frame, scaled, overhead = np.median(np.array(self._recent), axis=0)
+    # Scaled work goes ~4x per level finer; the rest (capture, display) doesn't move. The
+    # pyramid overhead is gone entirely at level 0 and about the same at any other level
+    # (the first pyrDown and the full-size upsample dominate it)
+    fixed = frame - scaled - overhead
+    finer = fixed + 4 * scaled + (overhead if self.level > 1 else 0.0)
+    if frame > self.budget_ms and self.level < self.max_level:
+      self._switch(+1)
+    elif finer < self.budget_ms * self.headroom and self.level > 0:
+      self._switch(-1)
+    return self.level
+
+  def _switch(self, step):
+    self.level += step
+    self.switches += 1
+    self._recent.clear()
+    self._hold = self.cooldown
+
+  def _write(self, frame_ms, scaled_ms):
+    if not self._log_path:
+      return
+    if self._log is None:
+      new = not os.path.exists(self._log_path)
+      self._log = open(self._log_path, 'a', newline='')
+      self._writer = csv.writer(self._log)
+      if new:
+        self._writer.writerow(['time', 'frame', 'frame_ms', 'scaled_ms', 'level', 'scale'])
+    self._writer.writerow([f'{time.time():.3f}', self.frames, f'{frame_ms:.3f}', f'{scaled_ms:.3f}', self.level, self.scale])
+
+  def summary(self):
+    return {level: h.summary() for level, h in sorted(self.hists.items())}
+
+  def report(self):
+    for level, s in self.summary().items():
+      print(f"level {level} (1/{1 << level} scale) n={s['count']:<6} p50={s['p50_ms']:.2f}ms p95={s['p95_ms']:.2f}ms p99={s['p99_ms']:.2f}ms")
+    print(f'{self.switches} level switches over {self.frames} frames, budget {self.budget_ms:.0f} ms')
+
+  def close(self):
+    if self._log is not None:
+      self._log.close()
+      self._log = None
+
+
+def simulate(phases, budget_ms=30.0, fixed_ms=4.0, pyramid_ms=3.0, **kwargs):
+  """Drive a controller with modelled costs, no timing noise: per phase (full-res work ms, frames).
+
+  Work shrinks 4x per level; every level above 0 pays `pyramid_ms`. Returns the level after each phase.
+  """
+  ctl = AdaptiveResolution(budget_ms=budget_ms, log_path=None, **kwargs)
+  levels = []
+  for work_ms, n in phases:
+    for _ in range(n):
+      scaled = work_ms / 4 ** ctl.level
+      overhead = pyramid_ms if ctl.level else 0.0
+      ctl.record(fixed_ms + scaled + overhead, scaled, overhead)
+    levels.append(ctl.level)
+  return levels
+
+
+if __name__ == '__main__':
+  import color_lut
+  import sources
+  # Recovery check: 16 ms of work fits a 30 ms budget at full res (20 ms frames, inside the 75%
+  # headroom), 3x that doesn't. Once the load is gone the controller must come back to level 0
+  # -- counting the 3 ms pyramid overhead as fixed cost would predict 23 ms and keep it at level 1
+  levels = simulate([(16, 100), (48, 200), (16, 200)])
+  assert levels == [0, 1, 0], levels
+  print(f'simulated light / loaded / light: levels {levels}')
+  # 1080p red tracking with a load spike in the middle: per-pixel work costs 3x while
+  # "another process" competes for the CPU, then drops back
+  src = sources.SyntheticSource(1920, 1080, 30, 'red_ball')
+  frames = [src.read()[1] for _ in range(60)]
+  lut = color_lut.ColorLUT(color_lut.RED)
+  fixed_ms = 4.0 # capture + display stand-in
+  phases = (('light', 1, 150), ('loaded', 3, 300), ('light again', 1, 300))
+
+  def frame_step(frame, ctl, load):
+    t0 = time.perf_counter()
+    time.sleep(fixed_ms / 1e3)
+    small = ctl.down(frame) if ctl else frame
+    t1 = time.perf_counter()
+    for _ in range(load):
+      mask = cv2.medianBlur(lut.mask(small, 'red'), 5)
+    t2 = time.perf_counter() # only this part shrinks with the level; pyrDown/upsampling don't
+    mask = ctl.up_mask(mask, frame.shape) if ctl else mask
+    return (time.perf_counter() - t0) * 1e3, (t2 - t1) * 1e3
+
+  probe = [frame_step(frames[0], None, 1)[0] for _ in range(10)]
+  budget = 1.4 * float(np.median(probe)) # full resolution fits comfortably until the spike
+  print(f'budget {budget:.1f} ms (full-res frame ~{np.median(probe):.1f} ms when light)')
+  for name, ctl in (('fixed full-res', None), ('adaptive', AdaptiveResolution(budget_ms=budget, log_path=None))):
+    i = 0
+    for phase, load, n in phases:
+      times, levels = [], []
+      for _ in range(n):
+        frame_ms, scaled_ms = frame_step(frames[i % len(frames)], ctl, load)
+        i += 1
+        times.append(frame_ms)
+        levels.append(ctl.record(frame_ms, scaled_ms) if ctl else 0)
+      over = np.mean(np.array(times) > budget)
+      print(f'{name:<15}{phase:<12} p50 {np.percentile(times, 50):6.1f} ms  p95 {np.percentile(times, 95):6.1f} ms'
+            f'  over budget {over:5.1%}  levels used {sorted(set(levels))}')
+  ctl.report()
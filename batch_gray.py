@@ -0,0 +1,119 @@
+"""
+Batch Grayscale (Unit 1 at scale)
+- Overview: Run the Unit 1 load -> grayscale -> save flow over a whole folder or glob on a thread/process pool, with bounded in-flight work and per-stage throughput.
+- Inputs: A directory of images or a glob pattern (e.g. 'frames/*.png').
+- Usage: python batch_gray.py frames/ gray_frames/ --workers 8 [--processes] [--max-in-flight 32]
+"""
+
+import argparse
+import concurrent.futures as cf
+import glob
+import os
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+IMAGE_EXTS = {'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp'}
+STAGES = ('decode', 'convert', 'encode')
+
+
+def collect_paths(src):
+  # A directory means "every image inside it"; anything else is treated as a glob
+  p = Path(src)
+  if p.is_dir():
+    paths = [q for q in p.iterdir() if q.suffix.lower() in IMAGE_EXTS]
+  else:
+    paths = [Path(q) for q in glob.glob(src, recursive=True)]
+  return sorted(paths)
+
+
+def process_one(src, dst):
+  """Decode, convert and encode one image; return per-stage (seconds, bytes)."""
+  t0 = time.perf_counter()
+  data = np.fromfile(str(src), np.uint8) # read + imdecode == imread, but lets us count bytes
+  img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+  if img is None:
+    raise ValueError(f'could not decode {src}')
+  t1 = time.perf_counter()
+  gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+  t2 = time.perf_counter()
+  ok, buf = cv2.imencode(Path(dst).suffix, gray)
+  if not ok:
+    raise ValueError(f'could not encode {dst}')
+  buf.tofile(str(dst))
+  t3 = time.perf_counter()
+  return {
+    'decode': (t1 - t0, data.nbytes),
+    'convert': (t2 - t1, img.nbytes),
+    'encode': (t3 - t2, buf.nbytes),
+  }
+
+
+def run_batch(paths, out_dir, workers=None, processes=False, max_in_flight=None, ext=None):
+  """Process `paths` into `out_dir`; at most `max_in_flight` images are decoded at once."""
+  workers = workers or os.cpu_count() or 1
+  max_in_flight = max_in_flight or 2 * workers
+  out_dir = Path(out_dir)
+  out_dir.mkdir(parents=True, exist_ok=True)
+
+  stats = {s: [0.0, 0] for s in STAGES} # stage -> [busy seconds, bytes]
+  done, failed = 0, []
+  pool_cls = cf.ProcessPoolExecutor if processes else cf.ThreadPoolExecutor
+  start = time.perf_counter()
+  with pool_cls(max_workers=workers) as pool:
+    pending = {}
+    todo = iter(paths)
+    while True:
+      # Top up the window, then wait for at least one job to finish
+      for src in todo:
+        dst = out_dir / (src.stem + (ext or src.suffix))
+        pending[pool.submit(process_one, src, dst)] = src
+        if len(pending) >= max_in_flight:
+          break
+      if not pending:
+        break
+      finished, _ = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+      for fut in finished:
+        src = pending.pop(fut)
+        try:
+          result = fut.result()
+        except Exception as e: # keep going; a bad frame shouldn't kill the batch
+          failed.append((src, e))
+          continue
+        for s, (sec, nbytes) in result.items():
+          stats[s][0] += sec
+          stats[s][1] += nbytes
+        done += 1
+  wall = time.perf_counter() - start
+  return {'images': done, 'failed': failed, 'wall': wall, 'workers': workers, 'stages': stats}
+
+
+def report(summary):
+  n, wall, workers = summary['images'], summary['wall'], summary['workers']
+  print(f"{n} images in {wall:.2f}s with {workers} workers: {n / wall if wall else 0:.1f} images/s overall")
+  # Per-stage rates are per worker (busy time); multiply by workers for the pool ceiling
+  for s in STAGES:
+    sec, nbytes = summary['stages'][s]
+    ips = n / sec if sec else 0
+    mbs = nbytes / sec / 1e6 if sec else 0
+    print(f"  {s:<8} {ips:8.1f} images/s  {mbs:8.1f} MB/s  (per worker)")
+  for src, e in summary['failed']:
+    print(f"  failed: {src}: {e}")
+
+
+if __name__ == '__main__':
+  ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  ap.add_argument('src', help='directory or glob of input images')
+  ap.add_argument('out_dir', help='where grayscale images are written')
+  ap.add_argument('--workers', type=int, default=None, help='pool size (default: CPU count)')
+  ap.add_argument('--processes', action='store_true', help='use processes instead of threads')
+  ap.add_argument('--max-in-flight', type=int, default=None, help='bound on queued/decoded images (default: 2x workers)')
+  ap.add_argument('--ext', default=None, help="output extension, e.g. '.png' (default: same as input)")
+  args = ap.parse_args()
+
+  paths = collect_paths(args.src)
+  if not paths:
+    raise SystemExit(f'no images matched {args.src!r}')
+  report(run_batch(paths, args.out_dir, args.workers, args.processes, args.max_in_flight, args.ext))
@@ -0,0 +1,166 @@
+"""
+Filter-Bank Benchmark (Unit 4 blurs at scale)
+- Overview: Time the Unit 4 blur family -- box (`blur` and an integral-image version), Gaussian (`GaussianBlur`, `sepFilter2D`, non-separable `filter2D`) and `medianBlur` -- over a grid of resolutions, kernel sizes, channel counts and dtypes; record wall time, throughput and peak memory as JSON, and diff two runs to catch regressions.
+- Inputs: None (images are generated); a grid preset ('quick' or 'full').
+- Usage: python bench_filters.py --out bench.json [--grid quick]
+         python bench_filters.py --compare base.json bench.json [--threshold 0.15]
+  Peak memory is what tracemalloc sees: outputs and NumPy temporaries, not OpenCV's internal scratch buffers.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+
+def _box_integral(img, k):
+  # Sum table once, then every window is four lookups: cost is flat in k
+  r = k // 2
+  padded = cv2.copyMakeBorder(img, r, r, r, r, cv2.BORDER_REFLECT_101) # blur's default border
+  sdepth = cv2.CV_64F if img.dtype == np.float32 else cv2.CV_32S
+  s = cv2.integral(padded, sdepth=sdepth)
+  box = s[k:, k:] - s[:-k, k:] - s[k:, :-k] + s[:-k, :-k]
+  if img.dtype == np.uint8:
+    return ((box + (k * k) // 2) // (k * k)).astype(np.uint8)
+  return (box / (k * k)).astype(img.dtype)
+
+
+def _gaussian_sep(img, k):
+  g = cv2.getGaussianKernel(k, 0)
+  return cv2.sepFilter2D(img, -1, g, g)
+
+
+def _gaussian_2d(img, k):
+  g = cv2.getGaussianKernel(k, 0)
+  return cv2.filter2D(img, -1, g @ g.T)
+
+
+# name -> (filter, reference it should match or None, supports(dtype, k))
+FILTERS = {
+  'blur': (lambda img, k: cv2.blur(img, (k, k)), None, lambda dtype, k: True),
+  'box_integral': (_box_integral, 'blur', lambda dtype, k: True),
+  'gaussian': (lambda img, k: cv2.GaussianBlur(img, (k, k), 0), None, lambda dtype, k: True),
+  'gaussian_sep': (_gaussian_sep, 'gaussian', lambda dtype, k: True),
+  'gaussian_2d': (_gaussian_2d, 'gaussian', lambda dtype, k: True),
+  # medianBlur only takes float input for 3x3/5x5
+  'median': (lambda img, k: cv2.medianBlur(img, k), None, lambda dtype, k: dtype == 'uint8' or k <= 5),
+}
+
+GRIDS = {
+  'quick': {'sizes': [(640, 480), (1920, 1080)], 'ksizes': [3, 9, 31], 'channels': [1, 3], 'dtypes': ['uint8']},
+  'full': {'sizes': [(640, 480), (1920, 1080), (3840, 2160)], 'ksizes': [3, 5, 9, 15, 31, 61],
+           'channels': [1, 3], 'dtypes': ['uint8', 'float32']},
+}
+
+
+def make_image(size, channels, dtype, seed=0):
+  """Smoothed noise: a realistic spread of values without depending on files on disk."""
+  w, h = size
+  rng = np.random.default_rng(seed)
+  img = cv2.GaussianBlur(rng.integers(0, 256, (h, w, channels), np.uint8), (0, 0), 2)
+  img = img.reshape(h, w) if channels == 1 else img
+  return img.astype(np.float32) / 255 if dtype == 'float32' else img
+
+
+def measure(fn, img, k, repeats):
+  """(median ms, peak MB allocated during one call, output)."""
+  out = fn(img, k) # warm up; also the output we check against the reference
+  times = []
+  for _ in range(repeats):
+    t0 = time.perf_counter()
+    fn(img, k)
+    times.append(time.perf_counter() - t0)
+  tracemalloc.start()
+  fn(img, k)
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return sorted(times)[len(times) // 2] * 1e3, peak / 2**20, out
+
+
+def run(grid='quick', filters=None, repeats=5, log=print):
+  spec = GRIDS[grid] if isinstance(grid, str) else grid
+  filters = filters or list(FILTERS)
+  results = []
+  for size, channels, dtype in itertools.product(spec['sizes'], spec['channels'], spec['dtypes']):
+    img = make_image(size, channels, dtype)
+    mpix = size[0] * size[1] / 1e6
+    for k in spec['ksizes']:
+      outputs = {}
+      for name in filters:
+        fn, ref, supports = FILTERS[name]
+        if not supports(dtype, k):
+          continue
+        ms, peak_mb, outputs[name] = measure(fn, img, k, repeats)
+        row = {'filter': name, 'size': f'{size[0]}x{size[1]}', 'ksize': k, 'channels': channels, 'dtype': dtype,
+               'ms': round(ms, 3), 'mpix_per_s': round(mpix / ms * 1e3, 1), 'peak_mb': round(peak_mb, 2)}
+        if ref in outputs: # how far a faster formulation drifts from the OpenCV call it replaces
+          row['max_abs_err'] = float(np.max(np.abs(outputs[name].astype(np.float64) - outputs[ref])))
+        results.append(row)
+        if log:
+          log(f"{name:<13}{row['size']:>10} k={k:<3}{channels}ch {dtype:<8}{ms:9.2f} ms"
+              f"{row['mpix_per_s']:9.1f} MPix/s{peak_mb:8.1f} MB")
+  return {'meta': environment(), 'grid': grid if isinstance(grid, str) else 'custom', 'repeats': repeats,
+          'results': results}
+
+
+def environment():
+  return {
+    'opencv': cv2.__version__, 'numpy': np.__version__, 'python': platform.python_version(),
+    'machine': platform.machine(), 'cpus': os.cpu_count(), 'cv2_threads': cv2.getNumThreads(),
+    'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+  }
+
+
+def _key(row):
+  return row['filter'], row['size'], row['ksize'], row['channels'], row['dtype']
+
+
+def compare(base, new, threshold=0.15):
+  """Rows whose time grew by more than `threshold` (fractional), as (key, base ms, new ms), slowest first."""
+  before = {_key(r): r for r in base['results']}
+  regressions = []
+  for row in new['results']:
+    old = before.get(_key(row))
+    if old and row['ms'] > old['ms'] * (1 + threshold):
+      regressions.append((_key(row), old['ms'], row['ms']))
+  return sorted(regressions, key=lambda r: r[2] / r[1], reverse=True)
+
+
+def _load(path):
+  with open(path) as f:
+    return json.load(f)
+
+
+if __name__ == '__main__':
+  ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  ap.add_argument('--grid', choices=sorted(GRIDS), default='quick')
+  ap.add_argument('--filters', nargs='+', choices=list(FILTERS), default=None)
+  ap.add_argument('--repeats', type=int, default=5)
+  ap.add_argument('--out', default=None, help='write results as JSON here')
+  ap.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help='diff two result files instead of running')
+  ap.add_argument('--threshold', type=float, default=0.15, help='slowdown that counts as a regression (0.15 = 15%%)')
+  args = ap.parse_args()
+
+  if args.compare:
+    base, new = map(_load, args.compare)
+    if base['meta']['opencv'] != new['meta']['opencv'] or base['meta']['machine'] != new['meta']['machine']:
+      print(f"note: comparing OpenCV {base['meta']['opencv']}/{base['meta']['machine']}"
+            f" against {new['meta']['opencv']}/{new['meta']['machine']}")
+    regressions = compare(base, new, args.threshold)
+    for (name, size, k, ch, dtype), old_ms, new_ms in regressions:
+      print(f'REGRESSION {name:<13}{size:>10} k={k:<3}{ch}ch {dtype:<8}{old_ms:9.2f} -> {new_ms:9.2f} ms'
+            f' ({new_ms / old_ms - 1:+.0%})')
+    print(f'{len(regressions)} regression(s) over {args.threshold:.0%} in {len(new["results"])} rows')
+    raise SystemExit(1 if regressions else 0)
+
+  report = run(args.grid, args.filters, args.repeats)
+  if args.out:
+    with open(args.out, 'w') as f:
+      json.dump(report, f, indent=1)
+    print(f"wrote {len(report['results'])} rows to {args.out}")
@@ -0,0 +1,103 @@
+"""
+Frame Buffer Pool
+- Overview: Reuse per-frame destination arrays, keyed by (shape, dtype), through OpenCV's `dst=` arguments instead of allocating new ones every frame.
+- Inputs: Shapes/dtypes of the intermediates a live loop produces.
+- Usage: `pool = bufpool.BufferPool()`; at the top of each frame `pool.recycle()`; then e.g.
+    `gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.take(frame.shape[:2]))`.
+  Buffers stay valid until the next `recycle()`. Run `python bufpool.py` for tracemalloc numbers.
+"""
+
+import collections
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+
+class BufferPool:
+  def __init__(self):
+    self._free = collections.defaultdict(list) # (shape, dtype) -> idle arrays
+    self._used = [] # handed out since the last recycle()
+    self.allocations = 0
+    self.allocated_bytes = 0
+
+  def take(self, shape, dtype=np.uint8, fill=None):
+    """A buffer of exactly `shape`/`dtype`; pass `fill` when the op only writes part of dst (e.g. masked ops)."""
+    key = (tuple(shape), np.dtype(dtype))
+    free = self._free[key]
+    if free:
+      buf = free.pop()
+    else:
+      buf = np.empty(key[0], key[1])
+      self.allocations += 1
+      self.allocated_bytes += buf.nbytes
+    self._used.append((key, buf))
+    if fill is not None:
+      buf.fill(fill)
+    return buf
+
+  def recycle(self):
+    """Return every buffer handed out since the last call; call once per frame."""
+    for key, buf in self._used:
+      self._free[key].append(buf)
+    self._used.clear()
+
+  def clear(self):
+    self._free.clear()
+    self._used.clear()
+
+
+# --- The Unit 3 recorder and Unit 6 tracker per-frame work, with and without the pool ---
+RED1 = ((0, 110, 50), (15, 255, 255))
+RED2 = ((170, 110, 50), (180, 255, 255))
+
+
+def record_step(frame, pool=None):
+  if pool is None:
+    frame = cv2.flip(frame, 1)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+  frame = cv2.flip(frame, 1, dst=pool.take(frame.shape, frame.dtype))
+  return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.take(frame.shape[:2], frame.dtype))
+
+
+def track_step(frame, pool=None):
+  if pool is None:
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    mask = cv2.bitwise_or(cv2.inRange(hsv, *RED1), cv2.inRange(hsv, *RED2))
+    return cv2.bitwise_and(frame, frame, mask=mask)
+  hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=pool.take(frame.shape))
+  mask = cv2.inRange(hsv, *RED1, dst=pool.take(frame.shape[:2]))
+  mask2 = cv2.inRange(hsv, *RED2, dst=pool.take(frame.shape[:2]))
+  cv2.bitwise_or(mask, mask2, dst=mask)
+  return cv2.bitwise_and(frame, frame, mask=mask, dst=pool.take(frame.shape, fill=0))
+
+
+def measure(step, frames, pool=None):
+  """(new bytes per frame seen by tracemalloc, ms per frame)."""
+  tracemalloc.start()
+  new_bytes = 0
+  t0 = time.perf_counter()
+  for frame in frames:
+    if pool is not None:
+      pool.recycle()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    out = step(frame, pool)
+    new_bytes += tracemalloc.get_traced_memory()[1] - base
+    del out
+  ms = (time.perf_counter() - t0) / len(frames) * 1e3
+  tracemalloc.stop()
+  return new_bytes / len(frames), ms
+
+
+if __name__ == '__main__':
+  import sources
+  src = sources.SyntheticSource(1920, 1080, 60, 'red_ball')
+  frames = [src.read()[1] for _ in range(120)]
+  print(f"{'pipeline':<10}{'mode':<8}{'MB/frame':>10}{'MB/s @60fps':>13}{'ms/frame':>10}")
+  for name, step in (('record', record_step), ('track', track_step)):
+    for mode, pool in (('alloc', None), ('pool', BufferPool())):
+      measure(step, frames[:5], pool) # warm up the pool and OpenCV
+      per_frame, ms = measure(step, frames, pool)
+      print(f'{name:<10}{mode:<8}{per_frame / 1e6:10.2f}{per_frame * 60 / 1e6:13.1f}{ms:10.2f}')
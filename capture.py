@@ -0,0 +1,117 @@
+"""
+Threaded Capture
+- Overview: Read frames on a background thread into a fixed ring of preallocated buffers, so a slow consumer no longer stalls the camera.
+- Inputs: A camera index / filename (opened with `cv2.VideoCapture`) or any object with the same `read()` contract.
+- Usage: `cap = capture.ThreadedCapture(0, policy='latest')`, then `ret, frame = cap.read()` as usual.
+  Policies: 'latest' hands out the newest frame and drops stale ones; 'no_drop' delivers every frame in order and makes the reader thread wait instead.
+  The frame returned by `read()` stays valid (and writable) until the next `read()`.
+  If the source raises (device unplugged, decode error), `read()` re-raises it once the frames captured before it are consumed.
+"""
+
+import collections
+import threading
+
+import cv2
+import numpy as np
+
+POLICIES = ('latest', 'no_drop')
+
+
+class ThreadedCapture:
+  def __init__(self, source=0, policy='latest', slots=4):
+    if policy not in POLICIES:
+      raise ValueError(f'policy must be one of {POLICIES}, got {policy!r}')
+    if slots < 3: # one held by the consumer, one being filled, one ready
+      raise ValueError('need at least 3 slots')
+    self.cap = source if hasattr(source, 'read') else cv2.VideoCapture(source)
+    self.policy = policy
+    self.captured = 0
+    self.dropped = 0
+    self._bufs = [None] * slots
+    self._free = collections.deque(range(slots))
+    self._ready = collections.deque()
+    self._held = None
+    self._eof = False
+    self._error = None # exception raised by the source, re-raised by read()
+    self._stop = False
+    self._cond = threading.Condition()
+    self._thread = threading.Thread(target=self._run, name='capture', daemon=True)
+    self._thread.start()
+
+  def _run(self):
+    try:
+      self._loop()
+    except BaseException as e: # e.g. the device was unplugged: hand the error to the consumer
+      self._error = e
+    finally:
+      with self._cond:
+        self._eof = True
+        self._cond.notify_all()
+
+  def _loop(self):
+    while True:
+      with self._cond:
+        while not self._free and not self._stop:
+          if self.policy == 'latest' and self._ready:
+            self._free.append(self._ready.popleft()) # overwrite the stalest frame
+            self.dropped += 1
+          else:
+            self._cond.wait()
+        if self._stop:
+          break
+        i = self._free.popleft()
+      buf = self._bufs[i]
+      try:
+        ok, img = self.cap.read(buf) if buf is not None else self.cap.read()
+      except BaseException:
+        with self._cond:
+          self._free.append(i)
+        raise
+      with self._cond:
+        if not ok:
+          self._free.append(i)
+          break
+        if buf is None: # first frame: now we know the shape, allocate the whole ring
+          self._bufs = [b if b is not None else np.empty_like(img) for b in self._bufs]
+        self._bufs[i] = img # normally `buf` itself; differs only if the frame size changed
+        self._ready.append(i)
+        self.captured += 1
+        self._cond.notify_all()
+
+  def read(self):
+    """Same contract as `cv2.VideoCapture.read()`: (ret, frame)."""
+    with self._cond:
+      if self._held is not None:
+        self._free.append(self._held)
+        self._held = None
+        self._cond.notify_all()
+      while not self._ready and not self._eof:
+        self._cond.wait()
+      if not self._ready:
+        if self._error is not None:
+          e, self._error = self._error, None
+          raise e
+        return False, None
+      if self.policy == 'latest':
+        while len(self._ready) > 1:
+          self._free.append(self._ready.popleft())
+          self.dropped += 1
+      self._held = self._ready.popleft()
+      self._cond.notify_all()
+      return True, self._bufs[self._held]
+
+  def isOpened(self):
+    return self.cap.isOpened()
+
+  def get(self, prop):
+    return self.cap.get(prop)
+
+  def set(self, prop, value):
+    return self.cap.set(prop, value)
+
+  def release(self):
+    with self._cond:
+      self._stop = True
+      self._cond.notify_all()
+    self._thread.join()
+    self.cap.release()
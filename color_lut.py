@@ -0,0 +1,201 @@
+"""
+BGR Color Lookup Table (Unit 6 tracking)
+- Overview: Compile any set of HSV `inRange` bands into a table indexed directly by the BGR pixel, so the mask (or label map) for one or many colors comes from a single lookup over the frame, with no HSV image and no per-band temporaries.
+- Inputs: Color classes as {name: [(lower_hsv, upper_hsv), ...]}, bounds inclusive like `cv2.inRange`; BGR uint8 frames.
+- Usage: `lut = color_lut.ColorLUT({'red': [((0, 110, 50), (15, 255, 255)), ((170, 110, 50), (180, 255, 255))]})`; per frame `mask = lut.mask(frame, 'red')`.
+  The default 8 bits per channel is a 16 MB table that matches cvtColor + inRange exactly; fewer bits (7: 8 MB, 6: 4 MB, 5: 2 MB) quantize the color cube, label each cell by its centre color, and only approximate it.
+  Run `python color_lut.py` for a check against the HSV path and timings.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+def all_colors(bits=8):
+  """Every quantized BGR color once, as an image: index b | g << bits | r << 2 bits along the flattened pixels."""
+  n = 1 << bits
+  step = 256 // n
+  v = (np.arange(n, dtype=np.uint16) * step + step // 2).astype(np.uint8) # cell centres (exact for bits=8)
+  cube = np.empty((n, n, n, 3), np.uint8) # [r, g, b, channel]
+  cube[..., 0] = v[None, None, :]
+  cube[..., 1] = v[None, :, None]
+  cube[..., 2] = v[:, None, None]
+  return cube.reshape(n * n, n, 3)
+
+
+class ColorLUT:
+  def __init__(self, classes, bits=8):
+    if not 1 <= bits <= 8:
+      raise ValueError('bits must be in 1..8')
+    if len(classes) > 255:
+      raise ValueError('at most 255 classes fit a uint8 label map')
+    self.names = list(classes)
+    self.bits = bits
+    # Label per color: run the exact HSV pipeline once over every color. Classes are
+    # tested in order, so where bands overlap the first class listed wins
+    hsv = cv2.cvtColor(all_colors(bits), cv2.COLOR_BGR2HSV)
+    table = np.zeros(hsv.shape[:2], np.uint8)
+    hit = np.empty(hsv.shape[:2], np.uint8)
+    for label, name in enumerate(self.names, 1):
+      cls = np.zeros(hsv.shape[:2], np.uint8)
+      for lower, upper in classes[name]:
+        cv2.bitwise_or(cls, cv2.inRange(hsv, lower, upper, dst=hit), dst=cls)
+      table[(cls > 0) & (table == 0)] = label
+    if bits == 8:
+      self.table = table.ravel()
+    else:
+      # Keep one byte per channel in the index so lookup stays a plain byte copy: the table
+      # is sparse (quantized values only) but still (2^bits / 256)^2 the size of the full one
+      n = 1 << bits
+      q = np.arange(n)
+      self.table = np.zeros((n - 1) * 0x010101 + 1, np.uint8)
+      self.table[(q[:, None, None] << 16 | q[None, :, None] << 8 | q[None, None, :]).ravel()] = table.ravel()
+      self._quantize = (np.arange(256) >> (8 - bits)).astype(np.uint8)
+    self._mask_tables = {}
+    self._packed = None # BGR00000 scratch (flat), grown as needed and reused for any smaller frame
+    self._quantized = None
+
+  def _index(self, frame):
+    """Flat table index per pixel."""
+    h, w = frame.shape[:2]
+    if self._packed is None or self._packed.size < h * w * 8:
+      self._packed = np.zeros(h * w * 8, np.uint8)
+    # Any smaller size (e.g. the dirty tiles of a gated stage) is a view of the same scratch;
+    # mixChannels only writes bytes 0-2 of each pixel, so bytes 3-7 are still 0
+    packed = self._packed[:h * w * 8].reshape(h, w, 8)
+    # Copy B, G, R into the low bytes of an 8-byte pixel whose other bytes stay 0: read as
+    # a little-endian intp that is b | g << 8 | r << 16, the table index, with no arithmetic
+    # and already the index type np.take wants (a uint32 index would cost a conversion pass)
+    if self.bits < 8:
+      if self._quantized is None or self._quantized.size < frame.size:
+        self._quantized = np.empty(frame.size, np.uint8)
+      frame = cv2.LUT(frame, self._quantize, dst=self._quantized[:frame.size].reshape(frame.shape))
+    cv2.mixChannels([frame], [packed], [0, 0, 1, 1, 2, 2])
+    return packed.view(np.intp)[..., 0]
+
+  def _check(self, frame):
+    if frame.dtype != np.uint8 or frame.ndim != 3 or frame.shape[2] != 3:
+      raise ValueError('ColorLUT expects BGR uint8 frames')
+
+  def classify(self, frame, dst=None):
+    """Label map: 0 for no class, else 1 + the index of the class in `names`."""
+    self._check(frame)
+    if dst is None:
+      dst = np.empty(frame.shape[:2], np.uint8)
+    return np.take(self.table, self._index(frame), out=dst)
+
+  def mask(self, frame, name=None, dst=None):
+    """0/255 mask for one class (or any class when `name` is None), in the same single lookup."""
+    self._check(frame)
+    mt = self._mask_tables.get(name)
+    if mt is None:
+      hit = self.table > 0 if name is None else self.table == self.names.index(name) + 1
+      mt = self._mask_tables[name] = hit.astype(np.uint8) * 255
+    if dst is None:
+      dst = np.empty(frame.shape[:2], np.uint8)
+    return np.take(mt, self._index(frame), out=dst)
+
+  def masks(self, frame):
+    """{name: 0/255 mask} for every class from one label map."""
+    labels = self.classify(frame)
+    return {name: cv2.compare(labels, i, cv2.CMP_EQ) for i, name in enumerate(self.names, 1)}
+
+  def segment(self, frame, dst=None):
+    """(label map, pixel count per class, (x, y) centroid per class) -- NaN centroid for absent classes.
+
+    Arrays are indexed by label, so entry 0 is the unclassified background. Cost doesn't
+    depend on how many classes there are: one lookup, then two bincounts over the labels.
+    """
+    labels = self.classify(frame, dst)
+    h, w = labels.shape
+    n = len(self.names) + 1
+    # Label histogram per row and per column; counts and first moments fall out of those
+    rows = np.bincount((labels + np.arange(0, h * n, n)[:, None]).ravel(), minlength=h * n).reshape(h, n)
+    cols = np.bincount((labels + np.arange(0, w * n, n)[None, :]).ravel(), minlength=w * n).reshape(w, n)
+    counts = rows.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+      centroids = np.stack([np.arange(w) @ cols, np.arange(h) @ rows], axis=1) / counts[:, None]
+    return labels, counts, centroids
+
+  def hsv_of(self, bgr):
+    """HSV of a single BGR pixel (for mouse callbacks, now that there is no HSV frame)."""
+    return cv2.cvtColor(np.uint8(bgr).reshape(1, 1, 3), cv2.COLOR_BGR2HSV)[0, 0]
+
+
+def hsv_masks(frame, classes):
+  """Reference: cvtColor + one inRange per band + bitwise_or, as cv07 does it."""
+  hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+  out = {}
+  for name, bands in classes.items():
+    mask = np.zeros(frame.shape[:2], np.uint8)
+    for lower, upper in bands:
+      cv2.bitwise_or(mask, cv2.inRange(hsv, lower, upper), dst=mask)
+    out[name] = mask
+  return out
+
+
+def hsv_segment(frame, classes):
+  """Reference for `segment`: per class cvtColor'd inRange masks, first class wins, cv2.moments per class."""
+  masks = hsv_masks(frame, classes)
+  labels = np.zeros(frame.shape[:2], np.uint8)
+  counts, centroids = [0], [(np.nan, np.nan)]
+  for label, mask in enumerate(masks.values(), 1):
+    cv2.bitwise_and(mask, cv2.compare(labels, 0, cv2.CMP_EQ), dst=mask) # earlier classes keep overlaps
+    labels[mask > 0] = label
+    m = cv2.moments(mask, binaryImage=True)
+    counts.append(int(m['m00']))
+    centroids.append((m['m10'] / m['m00'], m['m01'] / m['m00']) if m['m00'] else (np.nan, np.nan))
+  counts[0] = labels.size - sum(counts)
+  return labels, np.array(counts), np.array(centroids)
+
+
+def hue_palette(n, s_min=60, v_min=45):
+  """n classes splitting the hue circle evenly, for benchmarks."""
+  edges = np.linspace(0, 180, n + 1).round().astype(int)
+  return {f'hue{i}': [((int(a), s_min, v_min), (int(b) - 1, 255, 255))] for i, (a, b) in enumerate(zip(edges, edges[1:]))}
+
+
+RED = {'red': [((0, 110, 50), (15, 255, 255)), ((170, 110, 50), (180, 255, 255))]}
+# cv07's hue notes as classes
+PALETTE = dict(RED, green=[((35, 60, 45), (85, 255, 255))], blue=[((100, 60, 45), (130, 255, 255))],
+               yellow=[((20, 80, 80), (34, 255, 255))])
+
+
+def _ms(fn, frames):
+  t0 = time.perf_counter()
+  for f in frames:
+    fn(f)
+  return (time.perf_counter() - t0) / len(frames) * 1e3
+
+
+if __name__ == '__main__':
+  import sources
+  rng = np.random.default_rng(0)
+  src = sources.SyntheticSource(1920, 1080, 30, 'red_ball')
+  scenes = {
+    'red_ball': [src.read()[1] for _ in range(10)],
+    'noise': [rng.integers(0, 256, (1080, 1920, 3), np.uint8) for _ in range(10)], # every color region hit
+  }
+  for bits in (8, 7, 5):
+    t0 = time.perf_counter()
+    lut = ColorLUT(PALETTE, bits)
+    build = (time.perf_counter() - t0) * 1e3
+    frames = [f for fs in scenes.values() for f in fs]
+    agree = np.mean([np.mean(lut.mask(f, name) == ref) for f in frames for name, ref in hsv_masks(f, PALETTE).items()])
+    print(f'bits={bits}: table {lut.table.nbytes / 2**20:.1f} MB built in {build:.0f} ms, agrees with HSV on {agree:.4%} of pixels')
+    for scene, fs in scenes.items():
+      red = {'red': PALETTE['red']}
+      print(f'  1080p {scene:<9} red mask: HSV {_ms(lambda f: hsv_masks(f, red), fs):6.2f} ms | LUT {_ms(lambda f: lut.mask(f, "red"), fs):6.2f} ms'
+            f'   {len(PALETTE)} classes: HSV {_ms(lambda f: hsv_masks(f, PALETTE), fs):6.2f} ms | LUT {_ms(lut.classify, fs):6.2f} ms')
+
+  # Segmentation: one label map + counts + centroids, vs one HSV pipeline per class
+  photo = cv2.resize(cv2.imread('tree_img.jpg'), (1920, 1080))
+  print(f"\n{'classes':>7}{'HSV per class':>15}{'LUT segment':>13}  identical")
+  for n in (1, 2, 4, 8, 16, 32, 64):
+    palette = hue_palette(n)
+    lut = ColorLUT(palette)
+    ref, ours = hsv_segment(photo, palette), lut.segment(photo)
+    same = np.array_equal(ref[0], ours[0]) and np.array_equal(ref[1], ours[1]) and np.allclose(ref[2][1:], ours[2][1:], equal_nan=True)
+    print(f'{n:7d}{_ms(lambda f: hsv_segment(f, palette), [photo] * 5):13.2f}ms{_ms(lut.segment, [photo] * 5):11.2f}ms  {same}')
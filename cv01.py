@@ -7,12 +7,14 @@ Unit 1: Images & Grayscale
 
 import cv2
 from pathlib import Path
+import imcache
+import display
 
 print(cv2.__version__ )
 #print(cv2.getBuildInformation())
 
 # --- Reading and dimensions ---
-img = cv2.imread('test_img.png')
+img = imcache.imread('test_img.png') # cv2.imread through a shared decode cache (see imcache.py)
 print(f"imread() gives you: {type(img)}")
 print(f"img.shape: {img.shape}") # (height, width, color_channel)
 img_height = img.shape[0]
@@ -23,9 +25,9 @@ print(f'height: {img_height}, width: {img_width}, channel: {img_channel}')
 print(f"First pixel value at img[0,0] (B,G,R): {img[0,0]}")
 
 # Displaying an image
-cv2.imshow('Test Image', img)
-cv2.waitKey(0) # waits until a key is pressed
-cv2.destroyAllWindows() # closes displayed windows
+display.imshow('Test Image', img)
+display.waitKey(0) # waits until a key is pressed
+display.destroyAllWindows() # closes displayed windows
 print()
 
 # Converting to grayscale
@@ -34,9 +36,9 @@ print(f'Gray image shape (h x w): {gray_img.shape}')
 print(f"First pixel value at gray_img[0,0] (luminance): {gray_img[0,0]}") # grayscale value of the first pixel
 print("Standard grayscale conversion formula: Y = 0.299 R + 0.587 G + 0.114 B")
 print(f"Calculated grayscale value at img[0,0]: 0.299*{img[0,0][2]} + 0.587*{img[0,0][1]} + 0.114*{img[0,0][0]} = {0.299*img[0,0][2] + 0.587*img[0,0][1] + 0.114*img[0,0][0]}")
-cv2.imshow('Gray Image', gray_img)
-cv2.waitKey(0) # waits until a key is pressed
-cv2.destroyAllWindows() # closes displayed windows
+display.imshow('Gray Image', gray_img)
+display.waitKey(0) # waits until a key is pressed
+display.destroyAllWindows() # closes displayed windows
 print()
 
 # Writing an image
@@ -59,5 +61,6 @@ Tips:
  - Check `img is not None` after `imread` to avoid NoneType errors.
  - Use small images for quick experiments; large ones slow down UI.
  - Prefer absolute or script-relative paths to avoid CWD surprises.
+ - For whole folders of frames, `batch_gray.py` runs this flow on a worker pool.
 '''
 
@@ -6,8 +6,12 @@ Unit 2: Drawing & Basic Ops
 """
 
 import cv2
+import imcache
+import geom_plan
+import tiling
+import display
 
-gray_img = cv2.imread('gray_img.png')
+gray_img = imcache.imread('gray_img.png') # cached cv2.imread; read-only, so copy before drawing
 
 # --- Drawing on images ---
 drawn_image = gray_img.copy() # deep copy
@@ -19,19 +23,19 @@ cv2.rectangle(drawn_image, (drawn_image.shape[1]//4, drawn_image.shape[0]//4), (
 cv2.circle(drawn_image, (drawn_image.shape[1]//2, drawn_image.shape[0]//2), drawn_image.shape[0]//8, 0, -1) #-1 thickness fills the circle
 # Text: img, text, bottom-left, font, font-scale, color, thickness
 cv2.putText(drawn_image, 'Hello OpenCV', (drawn_image.shape[1]//4, drawn_image.shape[0]//8), cv2.FONT_HERSHEY_SIMPLEX, 2, 0, 3)
-cv2.imshow("drawings", drawn_image)
+display.imshow("drawings", drawn_image)
 cv2.imwrite('drawn_image.png', drawn_image)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.waitKey(0)
+display.destroyAllWindows()
 print()
 
 # --- Cropping images ---
 cropped_img = gray_img.copy()
 cropped_img = cropped_img[0:cropped_img.shape[0]//2,0:] #rows, cols
 print(f'cropped_img shape: {cropped_img.shape}')
-cv2.imshow("cropped", cropped_img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow("cropped", cropped_img)
+display.waitKey(0)
+display.destroyAllWindows()
 print()
 
 # --- Resizing images ---
@@ -41,9 +45,9 @@ resized_img = gray_img.copy()
 # shrinking methods: INTER_AREA (better but slower), INTER_LINEAR (faster)
 resized_img = cv2.resize(resized_img, (resized_img.shape[1]//2, resized_img.shape[0]//2))
 print(f'resized_img shape: {resized_img.shape}')
-cv2.imshow("resized_img", resized_img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow("resized_img", resized_img)
+display.waitKey(0)
+display.destroyAllWindows()
 print()
 
 # --- Flipping images ---
@@ -51,37 +55,49 @@ flipped_img = gray_img.copy()
 flipped_h = cv2.flip(flipped_img, 1) #1: horizontal
 flipped_v = cv2.flip(flipped_img, 0) #0: vertical
 flipped_hv = cv2.flip(flipped_img, -1) #-1: both
-cv2.imshow("flipped_h", flipped_h)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
-cv2.imshow("flipped_v", flipped_v)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
-cv2.imshow("flipped_hv", flipped_hv)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow("flipped_h", flipped_h)
+display.waitKey(0)
+display.destroyAllWindows()
+display.imshow("flipped_v", flipped_v)
+display.waitKey(0)
+display.destroyAllWindows()
+display.imshow("flipped_hv", flipped_hv)
+display.waitKey(0)
+display.destroyAllWindows()
 print()
 
 # --- Rotating images ---
 rotated_img = gray_img.copy()
 rotated_img = cv2.rotate(rotated_img, cv2.ROTATE_90_CLOCKWISE) #ROTATE_90_COUNTERCLOCKWISE, ROTATE_180
-cv2.imshow("rotated_img", rotated_img)
-cv2.waitKey(0) 
-cv2.destroyAllWindows()
+display.imshow("rotated_img", rotated_img)
+display.waitKey(0) 
+display.destroyAllWindows()
+print()
+
+# --- Chaining ops without the copies ---
+# Crops, flips and 90-degree rotations only change strides, so a chain of them
+# (plus resizes) folds into one view and at most one resize pass (see geom_plan.py).
+ops = [('crop', 0, gray_img.shape[0]//2, 0, gray_img.shape[1]), # rows, cols like slicing
+       ('resize', (gray_img.shape[1]//2, gray_img.shape[0]//4)),
+       ('flip', 1),
+       ('rotate', cv2.ROTATE_90_CLOCKWISE)]
+chained_img = geom_plan.apply_ops(gray_img, ops)
+print(f'chained_img shape: {chained_img.shape}')
+display.imshow("chained_img", chained_img)
+display.waitKey(0)
+display.destroyAllWindows()
 print()
 
 # --- ROI (reuse) ---
 roi_repeated = gray_img.copy()
 cv2.circle(roi_repeated, (30, 30), 30, 255, 1)
 roi = roi_repeated[0:60, 0:60]
-for x in range(0, roi_repeated.shape[1], 60):
-  for y in range(0, roi_repeated.shape[0], 60):
-    # Checkerboard pattern
-    if (x//60 + y//60) % 2 == 0:
-      roi_repeated[y:y+60, x:x+60] = roi
-cv2.imshow("roi_repeated", roi_repeated)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+# Checkerboard pattern: every tile with (x//60 + y//60) % 2 == 0 gets the ROI.
+# tiling.stamp writes them all with strided NumPy assignments instead of a per-tile loop.
+tiling.stamp(roi_repeated, roi, 'checkerboard')
+display.imshow("roi_repeated", roi_repeated)
+display.waitKey(0)
+display.destroyAllWindows()
 print()
 
 '''
@@ -1,15 +1,24 @@
 """
 Unit 3: Webcam Preview & FPS
 - Overview: Open webcam, show live frames, and overlay FPS (running average).
-- Inputs: Default camera index 0.
+- Inputs: Default camera index 0, or any $CV_SOURCE spec (see sources.py).
 - Usage: Press 'q' in the preview window to exit.
 """
 
 import cv2, time, collections
+import display
+import capture
+import sources
+import latency
 
 # --- Camera setup ---
 # Index 0 selects the default camera. A filename like 'video.mp4' also works.
-cap = cv2.VideoCapture(0)
+# sources.open_source() reads $CV_SOURCE (default '0'); e.g. CV_SOURCE='synthetic?fps=60'
+# runs this loop with generated frames at 60 FPS on a machine without a camera. Keep the fps=:
+# an unpaced source outruns the loop and 'latest' then drops most of its frames.
+# ThreadedCapture wraps cv2.VideoCapture: frames are grabbed on a background thread,
+# and 'latest' hands us the newest one so a slow loop doesn't lag behind the camera.
+cap = capture.ThreadedCapture(sources.open_source(), policy='latest')
 
 '''
 These settings may or may not work depending on your camera and OpenCV backend
@@ -25,9 +34,13 @@ print(f"Camera reports: {w}x{h} @ {fps_reported} FPS (may be unreliable)")
 
 # --- FPS running average over last 30 frames ---
 times = collections.deque(maxlen=30)
+# The average hides stalls; latency.StageTimer keeps p50/p95/p99 per stage as well
+lat = latency.StageTimer()
 start = time.time()
 while True:
+  lat.start_frame()
   ret, frame = cap.read() # ret is whether the frame was grabbed
+  lat.lap('capture')
   if not ret:
     print("Failed to grab frame")
     break
@@ -41,14 +54,21 @@ while True:
   fps = 1 / (sum(times) / len(times))
   # Overlay FPS text: (org), font, scale, color (BGR), thickness
   cv2.putText(frame, f'FPS: {fps:.1f}', (10,30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
+  lat.draw(frame) # p50/p95/p99 in ms under the FPS line
+  lat.lap('overlay')
 
-  cv2.imshow("Webcam", frame)
+  display.imshow("Webcam", frame)
 
   # Wait ~1 ms to process GUI events; quit on 'q'
-  if cv2.waitKey(1) & 0xFF == ord('q'):
+  key = display.waitKey(1)
+  lat.lap('display')
+  lat.end_frame()
+  if key & 0xFF == ord('q'):
     break
+print(f"Captured {cap.captured} frames, dropped {cap.dropped} stale ones")
+lat.report()
 cap.release()
-cv2.destroyAllWindows()
+display.destroyAllWindows()
 
 '''
 Unit 3 Summary
@@ -66,5 +86,5 @@ Key ideas:
 Tips:
  - Tune exposure/auto-exposure; it impacts FPS and motion blur.
  - On Linux, `v4l2-ctl` helps list/set camera capabilities.
- - Consider threading or async capture for CPU-bound pipelines.
+ - Consider threading or async capture for CPU-bound pipelines (see capture.py).
 '''
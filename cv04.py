@@ -1,42 +1,66 @@
 """
 Unit 3: Record Grayscale Video
 - Overview: Capture webcam, flip horizontally, convert to grayscale, and write MP4.
-- Inputs: Default camera index 0.
+- Inputs: Default camera index 0, or any $CV_SOURCE spec (see sources.py).
 - Usage: Press 'q' in the preview window to stop recording.
 """
 
 import cv2
+import display
+import capture
+import sources
+import latency
+import video_writer
+import bufpool
 
-cap = cv2.VideoCapture(0)
+# 'no_drop' keeps every frame for the recording; the camera thread waits instead of skipping
+cap = capture.ThreadedCapture(sources.open_source(), policy='no_drop')
 w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
 h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-fps = int(cap.get(cv2.CAP_PROP_FPS))
+fps = cap.get(cv2.CAP_PROP_FPS) # some cameras report 0
 
 # FourCC and writer params
+# AsyncVideoWriter encodes on a background thread behind a bounded queue, so a slow
+# encoder doesn't stall capture. With fps=0 it measures the rate from frame timestamps.
+# policy: 'block' (keep every frame), 'drop', or 'degrade' when the queue is full.
 fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out = cv2.VideoWriter('private_output.mp4', fourcc, fps, (w, h), isColor=False)
+out = video_writer.AsyncVideoWriter('private_output.mp4', fourcc, fps, (w, h), is_color=False, policy='block')
+lat = latency.StageTimer() # per-stage p50/p95/p99 (see latency.py)
+# Reuse the flip/gray outputs every frame via dst= instead of allocating new arrays
+pool = bufpool.BufferPool()
 while True:
+  pool.recycle()
+  lat.start_frame()
   ret, frame = cap.read()
+  lat.lap('capture')
   if not ret:
     print("Failed to grab frame")
     break
-  frame = cv2.flip(frame, 1)
-  frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+  frame = cv2.flip(frame, 1, dst=pool.take(frame.shape))
+  lat.lap('flip')
+  frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.take(frame.shape[:2]))
+  lat.lap('gray')
   out.write(frame)
-  cv2.imshow("Recording...", frame)
+  lat.lap('write')
+  display.imshow("Recording...", frame)
+  key = display.waitKey(1)
+  lat.lap('display')
+  lat.end_frame()
   
-  if cv2.waitKey(1) & 0xFF == ord('q'):
+  if key & 0xFF == ord('q'):
     break
 
+lat.report()
 cap.release()
-out.release()
-cv2.destroyAllWindows()
+out.release() # waits for the queue to drain
+print(f"Writer: {out.stats()}")
+display.destroyAllWindows()
 
 '''
 Unit 3 Summary
 Main functions:
  - `cv2.VideoWriter_fourcc(*'mp4v')` - MP4 codec
- - `cv2.VideoWriter(path, fourcc, fps, (w, h), isColor)` - writer
+ - `cv2.VideoWriter(path, fourcc, fps, (w, h), isColor)` - writer (wrapped by `video_writer.AsyncVideoWriter`)
  - `out.write(frame)` - append a frame
  - `cv2.flip(img, 1)` - horizontal flip
  - `cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)` - grayscale conversion
@@ -7,6 +7,8 @@ Unit 4: Blurring, Edges, Thresholds, Morphology
 
 import cv2
 import numpy as np
+import display
+import morphology
 
 # --- Blurring (Average, Gaussian, Median) ---
 noisy_img = cv2.imread('noisy_img.png')
@@ -14,20 +16,20 @@ noisy_img = cv2.imread('noisy_img.png')
 # Average blur (box filter): replace center with neighborhood average
 # - ksize: odd tuple (w, h). Larger -> more smoothing, more detail loss.
 blur = cv2.blur(noisy_img, (5, 5))
-cv2.imshow('Noisy Image', noisy_img)
-cv2.imshow('Average Blur', blur)
+display.imshow('Noisy Image', noisy_img)
+display.imshow('Average Blur', blur)
 
 # Gaussian blur: weighted average emphasizing center
 # - ksize: odd tuple; - sigmaX=0 lets OpenCV choose based on kernel size.
 gaussian = cv2.GaussianBlur(noisy_img, (5, 5), 0)
-cv2.imshow('Gaussian Blur', gaussian)
+display.imshow('Gaussian Blur', gaussian)
 
 # Median blur: non-linear; robust to salt-and-pepper while preserving edges
 # - ksize: odd integer window size.
 median = cv2.medianBlur(noisy_img, 5)
-cv2.imshow('Median Blur', median)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Median Blur', median)
+display.waitKey(0)
+display.destroyAllWindows()
 
 # --- Edge Detection (Canny) ---
 edge_img = cv2.imread('edge_img.jpg')
@@ -38,12 +40,12 @@ gray = cv2.cvtColor(blurred_edge_img, cv2.COLOR_BGR2GRAY)
 edges1 = cv2.Canny(gray, 100, 200)
 edges2 = cv2.Canny(gray, 150, 250)
 edges3 = cv2.Canny(gray, 200, 300)
-cv2.imshow('Original Edge Image', edge_img)
-cv2.imshow('Thresholds 100-200', edges1)
-cv2.imshow('Thresholds 150-250', edges2)
-cv2.imshow('Thresholds 200-300', edges3)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Original Edge Image', edge_img)
+display.imshow('Thresholds 100-200', edges1)
+display.imshow('Thresholds 150-250', edges2)
+display.imshow('Thresholds 200-300', edges3)
+display.waitKey(0)
+display.destroyAllWindows()
 
 # --- Thresholding (binary, inverse, adaptive) ---
 # Simple global thresholding: threshold, maxval, type
@@ -54,12 +56,12 @@ _, th2 = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)
 # - blockSize: odd neighborhood size; - C: constant subtracted from mean.
 th3 = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
                             cv2.THRESH_BINARY, 11, 2)
-cv2.imshow('Original Gray Image', gray)
-cv2.imshow('Simple Binary Thresholding', th1)
-cv2.imshow('Inverse Binary Thresholding', th2)
-cv2.imshow('Adaptive Gaussian Thresholding', th3)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Original Gray Image', gray)
+display.imshow('Simple Binary Thresholding', th1)
+display.imshow('Inverse Binary Thresholding', th2)
+display.imshow('Adaptive Gaussian Thresholding', th3)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Morphological Operations
@@ -82,24 +84,18 @@ kernel = np.ones((5, 5), np.uint8)
 # Tip: try non-rect kernels
 # kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5,5))
 
-# Erosion: shrink white regions
-eroded = cv2.erode(th1, kernel, iterations=1)
+# Erosion: shrink white regions; Dilation: expand white regions
+# Opening: erosion -> dilation (removes small noise); Closing: dilation -> erosion (fills small holes)
+# One call shares the erosion/dilation between the four (same results as cv2.erode/dilate/morphologyEx)
+out = morphology.morph(th1, kernel, ('erode', 'dilate', 'open', 'close'))
+eroded, dilated, opening, closing = out['erode'], out['dilate'], out['open'], out['close']
 
-# Dilation: expand white regions
-dilated = cv2.dilate(th1, kernel, iterations=1)
-
-# Opening: erosion -> dilation (removes small noise)
-opening = cv2.morphologyEx(th1, cv2.MORPH_OPEN, kernel)
-
-# Closing: dilation -> erosion (fills small holes)
-closing = cv2.morphologyEx(th1, cv2.MORPH_CLOSE, kernel)
-
-cv2.imshow('Eroded', eroded)
-cv2.imshow('Dilated', dilated)
-cv2.imshow('Opening', opening)
-cv2.imshow('Closing', closing)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Eroded', eroded)
+display.imshow('Dilated', dilated)
+display.imshow('Opening', opening)
+display.imshow('Closing', closing)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Unit 4 Summary
@@ -123,7 +119,11 @@ Key ideas:
 Tips:
  - Convert to grayscale before Canny/thresholding.
  - Use adaptive thresholding under varying illumination.
+ - Picking a denoiser? `python bench_filters.py --grid full` times the blur family across sizes, kernels and dtypes.
+ - Sweeping a grid of Canny thresholds (many pairs per low)? `canny_sweep.py` shares the gradients and the hysteresis work between them.
  - Prefer binary images (foreground=white) for morphology semantics.
  - Try cv2.getStructuringElement for ellipse/cross kernels when shapes matter.
+ - Need several of erode/dilate/open/close at once? `morphology.morph` shares the erosion/dilation between them.
+ - Images larger than RAM: `tiled_filter.py` runs these ops tile by tile with kernel-sized halos.
 '''
 
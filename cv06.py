@@ -7,8 +7,11 @@ Unit 5: Geometric Transforms
 
 import cv2
 import numpy as np
+import imcache
+import transforms
+import display
 
-img = cv2.imread('test_img.png')
+img = imcache.imread('test_img.png') # cached cv2.imread (see imcache.py)
 h, w = img.shape[:2]
 
 '''
@@ -26,10 +29,10 @@ M = np.float32([[1, 0, tx], [0, 1, ty]])
 M = np.float32([[1, 0, 100], [0, 1, 50]]) # warpAffine expects float32
 shifted = cv2.warpAffine(img, M, (w, h)) # note the output size is width by height not height by width like img.shape
 
-cv2.imshow('Original Image', img)
-cv2.imshow('Shifted Image', shifted)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Original Image', img)
+display.imshow('Shifted Image', shifted)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Rotation Matrix (origin)
@@ -52,9 +55,9 @@ angle = 45 # counter-clockwise
 scale = 1.0
 M = cv2.getRotationMatrix2D(center, angle, scale)
 rotated = cv2.warpAffine(img, M, (w, h))
-cv2.imshow('Rotated Image', rotated)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Rotated Image', rotated)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Affine Transformation
@@ -75,9 +78,9 @@ pts1 = np.float32([[50, 50], [200, 50], [50, 200]]) # original 'triangle'
 pts2 = np.float32([[10, 100], [200, 50], [100, 250]]) # warped 'triangle'
 M = cv2.getAffineTransform(pts1, pts2)
 affine = cv2.warpAffine(img, M, (w, h))
-cv2.imshow('Affine Transform', affine)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Affine Transform', affine)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Perspective Transformation
@@ -89,9 +92,20 @@ pts1 = np.float32([[56, 65], [368, 52], [28, 387], [389, 390]])
 pts2 = np.float32([[0, 0], [300, 0], [0, 300], [300, 300]])
 M = cv2.getPerspectiveTransform(pts1, pts2)
 perspective = cv2.warpPerspective(img, M, (300, 300)) # 300x300 output because pts2 is within that range?
-cv2.imshow('Perspective Transform', perspective)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Perspective Transform', perspective)
+display.waitKey(0)
+display.destroyAllWindows()
+
+'''
+Composing transforms
+Chaining the warps above re-samples (and blurs) the image once per step, and each step crops whatever falls outside (w, h).
+Multiplying the 3x3 homogeneous matrices first gives one matrix, so one warp; transforms.py also sizes the output to fit.
+'''
+chain = transforms.Transform().rotate(angle, center).scale(0.8).shear(0.2)
+composed = chain.apply(img) # one warpAffine, output sized to the rotated + sheared image
+display.imshow('Composed Transform', composed)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Unit 5 Summary
@@ -110,6 +124,7 @@ Key ideas:
 Tips:
  - Use float32 matrices; point sets must be non-collinear.
  - Choose output size carefully to avoid cropping after transforms.
- - Compose transforms by multiplying matrices before warping.
+ - Compose transforms by multiplying matrices before warping (see `transforms.Transform`).
+ - Same warp on every video frame? `warp_cache.warp` builds the remap tables once and reuses them.
 '''
 
@@ -1,11 +1,21 @@
 """
 Unit 6: HSV & Color Tracking
 - Overview: Create an HSV mask for a color range; then track color in live video.
-- Inputs: `tree_img.jpg` for static demo; webcam for live tracking.
+- Inputs: `tree_img.jpg` for static demo; webcam (or $CV_SOURCE, see sources.py) for live tracking.
 - Usage: Move mouse over the window to print HSV at cursor; press 'q' to quit.
 """
 
+import time
 import cv2
+import numpy as np
+import display
+import capture
+import sources
+import latency
+import bufpool
+import color_lut
+import motion_gate
+import adaptive_res
 
 # --- HSV color space (notes) ---
 # Hue in OpenCV is [0, 179].
@@ -37,45 +47,110 @@ def show_hsv(event, x, y, flags, param):
     h, s, v = pixel
     print(f'HSV: ({h}, {s}, {v})')
 
-cv2.imshow('Original', img)
-cv2.imshow('Mask', mask)
-cv2.imshow('Result', result)
-cv2.setMouseCallback('Original', show_hsv) # Register mouse event handler
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Original', img)
+display.imshow('Mask', mask)
+display.imshow('Result', result)
+display.setMouseCallback('Original', show_hsv) # Register mouse event handler
+display.waitKey(0)
+display.destroyAllWindows()
+
+# --- Several colors at once ---
+# One label map for a whole palette (0 = none of them), with pixel counts and centroids,
+# instead of one cvtColor/inRange pipeline per color (see color_lut.py)
+palette = {'green': [(lower_green, upper_green)],
+           'red': [((0, 110, 50), (15, 255, 255)), ((170, 110, 50), (180, 255, 255))],
+           'blue': [((100, 60, 45), (130, 255, 255))]}
+labels, counts, centroids = color_lut.ColorLUT(palette).segment(img)
+for name, n, (cx, cy) in zip(palette, counts[1:], centroids[1:]):
+  print(f'{name}: {n} px, centroid ({cx:.0f}, {cy:.0f})' if n else f'{name}: none')
+colors = np.uint8([[0, 0, 0], [0, 255, 0], [0, 0, 255], [255, 0, 0]]) # per label, BGR
+display.imshow('Labels', colors[labels])
+display.waitKey(0)
+display.destroyAllWindows()
 
 
 # --- Live Color Tracking ---
-cap = cv2.VideoCapture(0)
-cv2.namedWindow('Frame')
-cv2.setMouseCallback('Frame', show_hsv) # Register mouse event handler once
+# Red has two ranges in HSV
+lower_red1 = (0, 110, 50)
+upper_red1 = (15, 255, 255)
+lower_red2 = (170, 110, 50)
+upper_red2 = (180, 255, 255)
+# Compile both bands once into a BGR->mask table: each frame is then one lookup instead of
+# cvtColor + 2x inRange + bitwise_or (same mask, see color_lut.py)
+red_lut = color_lut.ColorLUT({'red': [(lower_red1, upper_red1), (lower_red2, upper_red2)]})
+
+frame = None
+# No HSV frame any more: convert just the pixel under the cursor
+def show_frame_hsv(event, x, y, flags, param):
+  if event == cv2.EVENT_MOUSEMOVE and frame is not None:
+    h, s, v = red_lut.hsv_of(frame[y, x])
+    print(f'HSV: ({h}, {s}, {v})')
+
+# $CV_SOURCE='synthetic?motion=red_ball' gives a moving red disc to track without a camera
+cap = capture.ThreadedCapture(sources.open_source(), policy='latest') # background grabbing (see capture.py)
+display.namedWindow('Frame')
+display.setMouseCallback('Frame', show_frame_hsv) # Register mouse event handler once
+lat = latency.StageTimer() # per-stage p50/p95/p99 (see latency.py)
+# A fixed camera mostly sees the same scene: the gate marks which 64x64 tiles changed, and the
+# gated stages below recompute only those, keeping their previous output elsewhere (see motion_gate.py)
+gate = motion_gate.MotionGate()
+# dst=True: both stages write into their cached outputs, so steady state allocates nothing
+masker = gate.stage(lambda f, dst=None: red_lut.mask(f, 'red', dst=dst), dst=True)
+def keep_red_into(f, m, dst=None):
+  # With mask=, pixels outside the mask are left as they were in dst, so start from zeros
+  if dst is None:
+    dst = np.zeros_like(f)
+  else:
+    dst[...] = 0
+  return cv2.bitwise_and(f, f, mask=m, dst=dst)
+# Runs at full resolution; the gate's tiles (on the pyramid level) are scaled up to match
+keep_red = gate.stage(keep_red_into, dst=True)
+# Under load, compute the mask on a 1/2 or 1/4 scale pyramid level to stay within ~30 FPS,
+# then scale the mask back up (see adaptive_res.py)
+res = adaptive_res.AdaptiveResolution(budget_ms=33)
+pool = bufpool.BufferPool() # the upsampled mask reuses the same array via dst= (see bufpool.py)
 while True:
+  pool.recycle()
+  lat.start_frame()
   ret, frame = cap.read()
+  lat.lap('capture')
   if not ret:
     print("Failed to grab frame")
     break
-  
-  hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-  
-  # Red has two ranges in HSV
-  lower_red1 = (0, 110, 50)
-  upper_red1 = (15, 255, 255)
-  lower_red2 = (170, 110, 50)
-  upper_red2 = (180, 255, 255)
-
-  mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-  mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-  mask = cv2.bitwise_or(mask1, mask2) # Fuse the two masks
-
-  result = cv2.bitwise_and(frame, frame, mask=mask)
-
-  cv2.imshow('Frame', frame)
-  cv2.imshow('Mask', mask)
-  cv2.imshow('Result', result)
-  if cv2.waitKey(1) & 0xFF == ord('q'):
+
+  t_work = time.perf_counter() # budget our own work, not the wait for the camera
+  small = res.down(frame)
+  lat.lap('pyramid')
+
+  t0 = time.perf_counter()
+  gate.update(small)
+  lat.lap('gate')
+  small_mask = masker(small)
+  scaled_ms = (time.perf_counter() - t0) * 1e3 # the part that shrinks with the pyramid level
+  mask = res.up_mask(small_mask, frame.shape, dst=pool.take(frame.shape[:2]))
+  lat.lap('mask')
+
+  result = keep_red(frame, mask)
+  lat.lap('result')
+
+  lat.draw(frame, org=(10, 20))
+  cv2.putText(frame, f'mask at 1/{1 << res.level} scale', (10, frame.shape[0] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+  display.imshow('Frame', frame)
+  display.imshow('Mask', mask)
+  display.imshow('Result', result)
+  key = display.waitKey(1)
+  lat.lap('display')
+  lat.end_frame()
+  res.record((time.perf_counter() - t_work) * 1e3, scaled_ms)
+  if key & 0xFF == ord('q'):
     break
+lat.report()
+res.report()
+res.close()
+s = gate.stats()
+print(f"Motion gate: {s['skip_ratio']:.0%} of tiles skipped, {s['skipped_frames']}/{s['frames']} frames unchanged, ~{s['saved_ms']:.0f} ms saved")
 cap.release()
-cv2.destroyAllWindows()
+display.destroyAllWindows()
 
 '''
 Unit 6 Summary
@@ -84,6 +159,8 @@ Main functions:
  - `cv2.inRange(hsv, lower, upper)` — binary mask for color range
  - `cv2.bitwise_and(img, img, mask)` — keep only masked regions
  - `cv2.setMouseCallback(win, func)` — inspect pixel HSV interactively
+ - `color_lut.ColorLUT(classes)` — HSV bands compiled into one BGR lookup for live masks
+ - `ColorLUT.segment(img)` — label map + per-class counts/centroids for a whole palette
 
 Key ideas:
  - OpenCV Hue range is [0, 179]; red often needs two hue bands.
@@ -94,4 +171,6 @@ Tips:
  - Don’t chase a perfect mask; postprocess with morphology/contours/filters.
  - Tune S/V thresholds to reject gray/dark backgrounds.
  - Sample HSV dynamically under your lighting rather than hard‑coding.
+ - Fixed camera? Gate per-pixel stages on changed tiles (`motion_gate.py`) instead of redoing static regions.
+ - Masks rarely need full resolution: `adaptive_res.py` drops to 1/2 or 1/4 scale only when the frame budget is blown.
 '''
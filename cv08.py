@@ -7,6 +7,9 @@ Unit 7: Contours & Shapes
 
 import cv2
 import numpy as np
+import contour_table
+import spatial_index
+import display
 
 # --- Preprocess ---
 img = cv2.imread('shapes.jpg')
@@ -19,12 +22,12 @@ _, thresh = cv2.threshold(gray, 90, 255, cv2.THRESH_BINARY)
 kernel = np.ones((3,3), np.uint8)
 opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
 
-cv2.imshow('Original', img)
-cv2.imshow('Gray', gray)
-cv2.imshow('Threshold', thresh)
-cv2.imshow('Opened', opening)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Original', img)
+display.imshow('Gray', gray)
+display.imshow('Threshold', thresh)
+display.imshow('Opened', opening)
+display.waitKey(0)
+display.destroyAllWindows()
 
 # --- Find contours ---
 contours, _ = cv2.findContours(opening, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -33,9 +36,9 @@ print(f'Number of contours found: {len(contours)}')
 # Draw all contours (idx=-1 means all); thickness=3
 contour_img = img.copy()
 cv2.drawContours(contour_img, contours, -1, (0, 255, 0), 3)
-cv2.imshow('Contours', contour_img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Contours', contour_img)
+display.waitKey(0)
+display.destroyAllWindows()
 
 # --- Bounding shapes ---
 bound_shapes = img.copy()
@@ -55,9 +58,9 @@ cv2.drawContours(bound_shapes, [box], 0, (0,0,255), 2)
 (xc, yc), radius = cv2.minEnclosingCircle(c)
 cv2.circle(bound_shapes, (int(xc), int(yc)), int(radius), (0,255,255), 2)
 
-cv2.imshow("Largest shape bounded", bound_shapes)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow("Largest shape bounded", bound_shapes)
+display.waitKey(0)
+display.destroyAllWindows()
 
 # --- Contour features ---
 # Moments encode properties like area, centroid, and orientation
@@ -67,9 +70,9 @@ M = cv2.moments(c)
 cx = int(M["m10"] / M["m00"]) # m10 first order moments that weight the contour's pixels by x
 cy = int(M["m01"] / M["m00"]) # m01 by y, m00 is basically the contour area
 cv2.circle(bound_shapes, (cx, cy), 5, (0,0,255), -1)
-cv2.imshow("Centroid ", bound_shapes)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow("Centroid ", bound_shapes)
+display.waitKey(0)
+display.destroyAllWindows()
 
 area = cv2.contourArea(c)
 perimeter = cv2.arcLength(c, True)
@@ -80,9 +83,21 @@ epsilon = 0.02 * perimeter # 0.001 is considered tight approx, 0.1 is considered
 approx = cv2.approxPolyDP(c, epsilon, True)
 print(approx)
 cv2.drawContours(img, [approx], -1, (0,255,0), 3)
-cv2.imshow("Approx contour", img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow("Approx contour", img)
+display.waitKey(0)
+display.destroyAllWindows()
+
+# --- Features for every contour at once ---
+# One structured array, one row per contour, instead of one call per feature per contour (see contour_table.py)
+table = contour_table.contour_table(contours)
+for row in contour_table.sort_by(table, 'area', top=5):
+  print(f"#{row['index']}: area {row['area']:.0f}, perimeter {row['perimeter']:.1f}, "
+        f"centroid ({row['cx']:.0f}, {row['cy']:.0f}), {row['vertices']} vertices")
+quads = contour_table.select(table, vertices=4, area=(1000, None)) # filter on any columns
+print(f'{len(quads)} quadrilaterals with area >= 1000')
+# Picking: which shape is under a pixel / near it, without scanning every contour (see spatial_index.py)
+idx = spatial_index.GridIndex.from_table(table, contours)
+print('under image centre:', idx.point(img.shape[1] // 2, img.shape[0] // 2), '| 3 nearest:', idx.nearest(0, 0, k=3)[0])
 
 '''
 Unit 7 Summary
@@ -103,4 +118,6 @@ Tips:
  - Clean masks first (open/close) for better contours.
  - Guard against empty `contours` before `max()`.
  - Normalize epsilon by perimeter (e.g., 1-5%).
+ - Many contours? Build a `contour_table` and filter/sort its columns before any per-contour work.
+ - Repeated ROI/click/nearest queries over many shapes: a `spatial_index.GridIndex` beats scanning all bboxes.
 '''
@@ -7,6 +7,8 @@ Unit 8: Corner Detection
 
 import cv2
 import numpy as np
+import corners as corner_nms # the Shi-Tomasi section below has its own `corners` variable
+import display
 
 img = cv2.imread('chessboard.png')
 gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -33,9 +35,20 @@ max_response = dst.max() # this is numpy function for max
 threshold = 0.01 * max_response # this is a common thresholding strategy 1% of max
 mask = dst > threshold # numpy boolean mask. array of True/False based on threshold.
 img[mask] = [0, 0, 255] # set those pixels to red in original image. numpy boolean indexing in action.
-cv2.imshow('Harris Corners', img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Harris Corners', img)
+display.waitKey(0)
+display.destroyAllWindows()
+
+# The mask above paints every pixel near a corner. For corner *points*, keep only the local
+# maxima of the response (non-maximum suppression), strongest first (see corners.py)
+img = cv2.imread('chessboard.png')
+pts, scores = corner_nms.detect(gray, quality=0.01, block_size=2, ksize=3, k=0.06, max_corners=200)
+for x, y in pts:
+    cv2.circle(img, (int(x), int(y)), 3, (0, 0, 255), -1)
+print(f'{len(pts)} Harris corners (vs {int(mask.sum())} painted pixels)')
+display.imshow('Harris Corners (NMS)', img)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Shi-Tomasi Corner Detection (better)
@@ -49,9 +62,9 @@ corners = cv2.goodFeaturesToTrack(gray, maxCorners=50, qualityLevel=0.95, minDis
 for c in corners:
     x, y = c.ravel()
     cv2.circle(img, (int(x), int(y)), 4, (255, 0, 0), -1)
-cv2.imshow('Shi-Tomasi Corners', img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Shi-Tomasi Corners', img)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Keypoints with ORB
@@ -68,9 +81,9 @@ orb = cv2.ORB_create()
 kp, des = orb.detectAndCompute(gray, None)
 # Draw keypoints
 img_kp = cv2.drawKeypoints(img, kp, None, color=(0, 255, 0), flags=0)
-cv2.imshow('ORB Keypoints', img_kp)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('ORB Keypoints', img_kp)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Feature Matching
@@ -91,9 +104,9 @@ matches = bf.match(des1, des2)
 matches = sorted(matches, key=lambda x: x.distance)
 
 img_matches = cv2.drawMatches(img1, kp1, img2, kp2, matches[:20], None, flags=2)
-cv2.imshow('Feature Matches', img_matches)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Feature Matches', img_matches)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Unit 8 Summary
@@ -115,6 +128,8 @@ Key ideas:
 Tips:
  - Convert to grayscale for detectors/descriptors; use float32 for Harris.
  - Tune `qualityLevel` (e.g., 0.01-0.1) and `minDistance` for Shi-Tomasi density.
+ - Need corner coordinates, an even spread, or big images? `corner_nms.detect(gray, grid=(8, 8), per_cell=20, tile=1024)` (corners.py).
  - For matching, consider `knnMatch` + Lowe's ratio test and enable `crossCheck` for stricter matches.
+ - Matching against a large gallery (100k+ descriptors)? `hamming_index.HammingIndex` avoids BFMatcher's full scan per query.
  - Ensure input images exist and are comparable in scale/content; resize thoughtfully.
 '''
@@ -7,6 +7,7 @@ Unit 9: Template Matching & Haar Cascades
 
 import cv2
 import numpy as np
+import display
 
 '''
 Template Matching
@@ -26,10 +27,10 @@ loc = np.where(res >= 0.90)
 for pt in zip(*loc[::-1]):
     cv2.rectangle(img, pt, (pt[0] + w, pt[1] + h), (0, 255, 0), 1)
 
-cv2.imshow('Detected', img)
-cv2.imshow('Template', template)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Detected', img)
+display.imshow('Template', template)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Haar Cascade Face Detection
@@ -46,9 +47,9 @@ faces = face_cascade.detectMultiScale(gray, scaleFactor=1.05, minNeighbors=5)
 for (x,y,w,h) in faces:
     cv2.rectangle(img, (x,y), (x+w,y+h), (0,255,0), 2)
 
-cv2.imshow('Detected Faces', img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+display.imshow('Detected Faces', img)
+display.waitKey(0)
+display.destroyAllWindows()
 
 '''
 Unit 9 Summary
@@ -0,0 +1,119 @@
+"""
+Display Backends
+- Overview: Drop-in replacements for `cv2.imshow` / `cv2.waitKey` / `cv2.destroyAllWindows` that route frames to a pluggable sink, so every unit also runs headless.
+- Inputs: $CV_DISPLAY selects the sink: 'interactive' (default), 'null', 'collect', or 'disk:<dir>'.
+- Usage: `import display` then `display.imshow(...)`, `display.waitKey(0)`. Outside 'interactive', waits return -1 immediately.
+"""
+
+import os
+import re
+from pathlib import Path
+
+import cv2
+
+
+class InteractiveSink:
+  """HighGUI windows; the behaviour the units had before."""
+  interactive = True
+
+  def show(self, name, img):
+    cv2.imshow(name, img)
+
+  def wait(self, delay):
+    return cv2.waitKey(delay)
+
+  def close(self):
+    cv2.destroyAllWindows()
+
+  def named_window(self, name):
+    cv2.namedWindow(name)
+
+  def set_mouse_callback(self, name, fn, param=None):
+    cv2.setMouseCallback(name, fn, param)
+
+
+class NullSink:
+  """Drops every frame; waits never block. Use for timing pipelines end to end."""
+  interactive = False
+
+  def show(self, name, img):
+    pass
+
+  def wait(self, delay):
+    return -1 # same as waitKey timing out with no key pressed
+
+  def close(self):
+    pass
+
+  def named_window(self, name):
+    pass
+
+  def set_mouse_callback(self, name, fn, param=None):
+    pass
+
+
+class CollectSink(NullSink):
+  """Keeps (window name, copy of image) pairs in memory, in show order."""
+
+  def __init__(self):
+    self.frames = []
+
+  def show(self, name, img):
+    self.frames.append((name, img.copy())) # callers often reuse their buffers
+
+
+class DiskSink(NullSink):
+  """Writes each shown image to `<out_dir>/<seq>_<window>.png`."""
+
+  def __init__(self, out_dir):
+    self.out_dir = Path(out_dir)
+    self.out_dir.mkdir(parents=True, exist_ok=True)
+    self.count = 0
+
+  def show(self, name, img):
+    safe = re.sub(r'[^\w.-]+', '_', name).strip('_') or 'window'
+    cv2.imwrite(str(self.out_dir / f'{self.count:05d}_{safe}.png'), img)
+    self.count += 1
+
+
+def sink_from_spec(spec):
+  kind, _, arg = spec.partition(':')
+  if kind in ('', 'interactive', 'gui'):
+    return InteractiveSink()
+  if kind in ('null', 'none', 'headless'):
+    return NullSink()
+  if kind == 'collect':
+    return CollectSink()
+  if kind == 'disk':
+    return DiskSink(arg or 'display_out')
+  raise ValueError(f'unknown display sink {spec!r}')
+
+
+sink = sink_from_spec(os.environ.get('CV_DISPLAY', 'interactive'))
+
+
+def set_sink(new_sink):
+  global sink
+  sink = new_sink
+  return sink
+
+
+# cv2-style names so the units read the same as before
+def imshow(name, img):
+  sink.show(name, img)
+
+
+def waitKey(delay=0):
+  return sink.wait(delay)
+
+
+def destroyAllWindows():
+  sink.close()
+
+
+def namedWindow(name):
+  sink.named_window(name)
+
+
+def setMouseCallback(name, fn, param=None):
+  sink.set_mouse_callback(name, fn, param)
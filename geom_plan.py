@@ -0,0 +1,154 @@
+"""
+Fused Geometric Ops (Unit 2 chains)
+- Overview: Fold a chain of crop/resize/flip/rotate ops into one mapping and run it as a zero-copy view plus at most one resampling pass.
+- Inputs: Any image array and a list of ops, e.g. [('crop', 0, 540, 0, 1920), ('resize', (960, 270)), ('flip', 1), ('rotate', cv2.ROTATE_90_CLOCKWISE)].
+- Usage: `geom_plan.apply_ops(img, ops)`; run `python geom_plan.py` for the step-by-step vs fused benchmark.
+"""
+
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# Ops are expressed as maps from new-image pixel-edge coords back to old-image coords.
+# Crops, flips and 90-degree rotations keep that map a signed axis permutation plus an
+# integer offset, which numpy can express as slicing/strides; only resizes add scale.
+
+
+def _op_matrix(op, size):
+  w, h = size
+  kind = op[0]
+  if kind == 'crop': # ('crop', y0, y1, x0, x1) with slice semantics: img[y0:y1, x0:x1]
+    y0, y1, _ = slice(op[1], op[2]).indices(h)
+    x0, x1, _ = slice(op[3], op[4]).indices(w)
+    return np.array([[1, 0, x0], [0, 1, y0], [0, 0, 1]], float), (max(x1 - x0, 0), max(y1 - y0, 0))
+  if kind == 'resize': # ('resize', (w, h)[, interpolation])
+    nw, nh = op[1]
+    return np.array([[w / nw, 0, 0], [0, h / nh, 0], [0, 0, 1]], float), (nw, nh)
+  if kind == 'flip': # ('flip', code) with cv2.flip codes
+    sx = -1 if op[1] in (1, -1) else 1
+    sy = -1 if op[1] in (0, -1) else 1
+    return np.array([[sx, 0, w if sx < 0 else 0], [0, sy, h if sy < 0 else 0], [0, 0, 1]], float), (w, h)
+  if kind == 'rotate': # ('rotate', cv2.ROTATE_*)
+    if op[1] == cv2.ROTATE_90_CLOCKWISE:
+      return np.array([[0, 1, 0], [-1, 0, h], [0, 0, 1]], float), (h, w)
+    if op[1] == cv2.ROTATE_90_COUNTERCLOCKWISE:
+      return np.array([[0, -1, w], [1, 0, 0], [0, 0, 1]], float), (h, w)
+    if op[1] == cv2.ROTATE_180:
+      return np.array([[-1, 0, w], [0, -1, h], [0, 0, 1]], float), (w, h)
+  raise ValueError(f'unsupported op {op!r}')
+
+
+class GeomPlan:
+  """A chain of ops folded into one output->source map for a given source size."""
+
+  def __init__(self, ops, src_size):
+    self.src_size = tuple(src_size) # (w, h)
+    self.interpolation = cv2.INTER_LINEAR
+    A = np.eye(3)
+    size = self.src_size
+    for op in ops:
+      M, size = _op_matrix(op, size)
+      A = A @ M
+      if op[0] == 'resize' and len(op) > 2:
+        self.interpolation = op[2]
+    self.matrix = A # out pixel-edge coords -> source pixel-edge coords
+    self.out_size = size
+
+    # Source box covered by the output, and whether it lands on whole pixels
+    w, h = size
+    corners = A @ np.array([[0, w, 0, w], [0, 0, h, h], [1, 1, 1, 1]], float)
+    x0, x1 = corners[0].min(), corners[0].max()
+    y0, y1 = corners[1].min(), corners[1].max()
+    box = np.array([x0, y0, x1, y1])
+    self.box = np.round(box).astype(int)
+    self.transposed = A[0, 0] == 0 and A[1, 1] == 0
+    self.fits_view = bool(np.allclose(box, self.box, atol=1e-6)) # else: one warpAffine
+
+  @property
+  def resamples(self):
+    bw, bh = self.box[2] - self.box[0], self.box[3] - self.box[1]
+    pre = self.out_size[::-1] if self.transposed else self.out_size
+    return not self.fits_view or (bw, bh) != tuple(pre)
+
+  def apply(self, img, contiguous=False):
+    if not self.fits_view:
+      return self._warp(img)
+    x0, y0, x1, y1 = self.box
+    out = img[y0:y1, x0:x1] # crop: a view
+    pre = self.out_size[::-1] if self.transposed else self.out_size
+    if out.shape[1::-1] != tuple(pre):
+      out = cv2.resize(out, pre, interpolation=self.interpolation) # the only pass that touches pixels
+    A = self.matrix
+    if self.transposed: # 90-degree turns: swap the two image axes, still a view
+      out = out.swapaxes(0, 1)
+      flip_rows, flip_cols = A[0, 1] < 0, A[1, 0] < 0
+    else:
+      flip_rows, flip_cols = A[1, 1] < 0, A[0, 0] < 0
+    out = out[::-1 if flip_rows else 1, ::-1 if flip_cols else 1] # flips: negative strides
+    return np.ascontiguousarray(out) if contiguous else out
+
+  def _warp(self, img):
+    # Crops landing between source pixels: one warp with the folded map (pixel-center convention)
+    A = self.matrix
+    M = A[:2].copy()
+    M[:, 2] += 0.5 * (A[:2, 0] + A[:2, 1]) - 0.5
+    return cv2.warpAffine(img, M, self.out_size, flags=self.interpolation | cv2.WARP_INVERSE_MAP)
+
+
+def plan(ops, shape):
+  """Fold `ops` for images of `shape` (numpy order, i.e. img.shape)."""
+  return GeomPlan(ops, (shape[1], shape[0]))
+
+
+def apply_ops(img, ops, contiguous=False):
+  return plan(ops, img.shape).apply(img, contiguous)
+
+
+def apply_stepwise(img, ops):
+  """Reference: one cv2 call (and one new array) per op, as Unit 2 does it."""
+  out = img
+  for op in ops:
+    kind = op[0]
+    if kind == 'crop':
+      out = out[op[1]:op[2], op[3]:op[4]].copy()
+    elif kind == 'resize':
+      out = cv2.resize(out, op[1], interpolation=op[2] if len(op) > 2 else cv2.INTER_LINEAR)
+    elif kind == 'flip':
+      out = cv2.flip(out, op[1])
+    elif kind == 'rotate':
+      out = cv2.rotate(out, op[1])
+  return out
+
+
+def _measure(fn, repeat=50):
+  fn() # warm up
+  tracemalloc.start()
+  fn()
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  t0 = time.perf_counter()
+  for _ in range(repeat):
+    fn()
+  return (time.perf_counter() - t0) / repeat * 1e3, peak
+
+
+if __name__ == '__main__':
+  img = np.random.default_rng(0).integers(0, 256, (1080, 1920), np.uint8)
+  chains = {
+    'crop>flip>rotate': [('crop', 0, 540, 0, 1920), ('flip', 1), ('rotate', cv2.ROTATE_90_CLOCKWISE)],
+    'crop>resize>flip>rotate': [('crop', 0, 540, 0, 1920), ('resize', (960, 270)), ('flip', -1),
+                                ('rotate', cv2.ROTATE_90_COUNTERCLOCKWISE)],
+    'flip>rotate>resize>crop': [('flip', 0), ('rotate', cv2.ROTATE_180), ('resize', (960, 540)), ('crop', 100, 400, 50, 850)],
+  }
+  print(f"{'chain':<26}{'mode':<10}{'ms':>8}{'peak KiB':>10}  pixel passes")
+  for name, ops in chains.items():
+    ref = apply_stepwise(img, ops)
+    fused = apply_ops(img, ops)
+    diff = np.abs(ref.astype(int) - fused.astype(int)).max() if ref.shape == fused.shape else 'shape!'
+    for mode, fn in (('stepwise', lambda: apply_stepwise(img, ops)), ('fused', lambda: apply_ops(img, ops))):
+      ms, peak = _measure(fn)
+      n = len(ops) if mode == 'stepwise' else int(plan(ops, img.shape).resamples)
+      print(f'{name:<26}{mode:<10}{ms:8.3f}{peak / 1024:10.1f}  {n}')
+    print(f'{"":<26}max |stepwise - fused| = {diff}')
@@ -0,0 +1,204 @@
+"""
+Hamming Index for ORB Descriptors (Unit 8 matching at scale)
+- Overview: Multi-index hashing over 256-bit binary descriptors: each descriptor is cut into 16-bit chunks, one bucket table per chunk (CSR arrays), so a query only ranks gallery entries that match it exactly -- or within `radius` flipped bits -- in at least one chunk, by popcount on packed uint64 words. knn with Lowe's ratio test, bulk insert, save/load as memory-mapped .npy files.
+- Inputs: (N, 32) uint8 descriptors, e.g. from `orb.detectAndCompute`.
+- Usage: `idx = hamming_index.HammingIndex(); idx.add(gallery_des)`; `ids, dists = idx.knn(des, k=2)`; `q, t, d = idx.match(des, ratio=0.8)`;
+    `idx.save('gallery_idx')` then `HammingIndex.load('gallery_idx')` (mapped, not read). Run `python hamming_index.py` for recall@k and queries/s against BFMatcher.
+  Results are exact for any neighbour closer than 16 x (radius + 1) bits (16 with the default radius 0); beyond that they are approximate.
+  radius=1 probes 17 keys per chunk instead of 1: higher recall, roughly 10x the candidates.
+"""
+
+import itertools
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+BITS = 256
+CHUNK_BITS = 16 # 16 chunks per descriptor, 65536 buckets per chunk table
+CHUNKS = BITS // CHUNK_BITS
+
+
+def popcount_rows(a):
+  """Bits set per row of a packed uint64 array."""
+  return np.bitwise_count(a).sum(axis=1, dtype=np.int32)
+
+
+def flip_masks(bits, radius):
+  """Every mask of `bits` bits with at most `radius` bits set: the keys to probe around a chunk."""
+  masks = [0]
+  for r in range(1, radius + 1):
+    masks += [sum(1 << i for i in c) for c in itertools.combinations(range(bits), r)]
+  return np.array(masks, np.int64)
+
+
+class HammingIndex:
+  def __init__(self, radius=0, batch=256):
+    self.radius = radius # bits flipped per chunk when probing
+    self.batch = batch # queries per vectorized step (bounds candidate memory)
+    self.descriptors = np.empty((0, BITS // 8), np.uint8)
+    self._items = self._start = None
+
+  def __len__(self):
+    return len(self.descriptors)
+
+  def _keys(self, des):
+    return np.ascontiguousarray(des).view('<u2').reshape(len(des), CHUNKS)
+
+  def add(self, descriptors):
+    """Bulk insert; returns the ids given to the new rows. The chunk tables are rebuilt (linear time: radix sort on uint16)."""
+    descriptors = np.asarray(descriptors, np.uint8).reshape(-1, BITS // 8)
+    first = len(self.descriptors)
+    self.descriptors = np.concatenate([self.descriptors, descriptors])
+    self._build()
+    return np.arange(first, len(self.descriptors))
+
+  def _build(self):
+    n, nb = len(self.descriptors), 1 << CHUNK_BITS
+    keys = self._keys(self.descriptors)
+    self._items = np.empty((CHUNKS, n), np.int32) # per chunk: ids ordered by that chunk's value
+    self._start = np.zeros((CHUNKS, nb + 1), np.int64) # per chunk: bucket offsets into _items
+    for j in range(CHUNKS):
+      self._items[j] = np.argsort(keys[:, j], kind='stable')
+      np.cumsum(np.bincount(keys[:, j], minlength=nb), out=self._start[j, 1:])
+
+  def _candidates(self, q):
+    """(query row, gallery id) pairs sharing a chunk within `radius` bits, deduplicated."""
+    n, nb = len(self.descriptors), 1 << CHUNK_BITS
+    probe = self._keys(q)[:, :, None].astype(np.int64) ^ flip_masks(CHUNK_BITS, self.radius) # (Q, chunks, probes)
+    flat = probe + (np.arange(CHUNKS) * (nb + 1))[None, :, None]
+    a = self._start.ravel()[flat].ravel()
+    lens = self._start.ravel()[flat + 1].ravel() - a
+    a += np.repeat(np.arange(CHUNKS) * n, probe.shape[2])[None, :].repeat(len(q), 0).ravel() # into _items.ravel()
+    total = int(lens.sum())
+    # Expand every bucket slice into item positions without a Python loop
+    pos = np.arange(total) - np.repeat(np.cumsum(lens) - lens, lens) + np.repeat(a, lens)
+    qid = np.repeat(np.arange(len(q)), lens.reshape(len(q), -1).sum(axis=1))
+    pair = np.unique(qid * n + self._items.ravel()[pos])
+    return pair // n, pair % n
+
+  def knn(self, query, k=2):
+    """(ids, distances), each (Q, k), nearest first; -1 / BITS + 1 where fewer than k candidates were found."""
+    query = np.asarray(query, np.uint8).reshape(-1, BITS // 8)
+    ids = np.full((len(query), k), -1, np.int64)
+    dists = np.full((len(query), k), BITS + 1, np.int32)
+    if not len(self.descriptors):
+      return ids, dists
+    gallery = self.descriptors.view(np.uint64)
+    for s in range(0, len(query), self.batch):
+      q = np.ascontiguousarray(query[s:s + self.batch])
+      qid, cand = self._candidates(q)
+      d = popcount_rows(gallery[cand] ^ q.view(np.uint64)[qid])
+      order = np.lexsort((d, qid)) # by query, nearest first
+      qid, cand, d = qid[order], cand[order], d[order]
+      rank = np.arange(len(qid)) - np.searchsorted(qid, qid)
+      keep = rank < k
+      ids[s + qid[keep], rank[keep]] = cand[keep]
+      dists[s + qid[keep], rank[keep]] = d[keep]
+    return ids, dists
+
+  def match(self, query, ratio=0.8):
+    """Lowe's ratio test on the 2 nearest: (query idx, gallery id, distance) arrays of the matches that pass."""
+    ids, dists = self.knn(query, 2)
+    # No second candidate means nothing else within the probed buckets: treated as unambiguous
+    ok = (ids[:, 0] >= 0) & (dists[:, 0] < ratio * dists[:, 1])
+    q = np.flatnonzero(ok)
+    return q, ids[q, 0], dists[q, 0]
+
+  def save(self, path):
+    """A directory of .npy files (+ meta.json) that `load` memory-maps."""
+    os.makedirs(path, exist_ok=True)
+    for name, arr in (('descriptors', self.descriptors), ('items', self._items), ('start', self._start)):
+      tmp = os.path.join(path, f'{name}.tmp.npy')
+      np.save(tmp, arr)
+      os.replace(tmp, os.path.join(path, f'{name}.npy')) # temp file + rename: readers never see half an array
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+      json.dump({'radius': self.radius}, f)
+
+  @classmethod
+  def load(cls, path, mmap=True, **kwargs):
+    """Open a saved index; with mmap the OS pages the tables in as queries touch them."""
+    with open(os.path.join(path, 'meta.json')) as f:
+      meta = json.load(f)
+    meta.update(kwargs)
+    idx = cls(**meta)
+    mode = 'r' if mmap else None
+    idx.descriptors = np.load(os.path.join(path, 'descriptors.npy'), mmap_mode=mode)
+    idx._items = np.load(os.path.join(path, 'items.npy'), mmap_mode=mode)
+    idx._start = np.load(os.path.join(path, 'start.npy'), mmap_mode=mode)
+    return idx
+
+
+def dmatches(q, t, d):
+  """`match` output as cv2.DMatch objects, for `cv2.drawMatches`."""
+  return [cv2.DMatch(int(a), int(b), float(c)) for a, b, c in zip(q, t, d)]
+
+
+def bf_knn(gallery, query, k=2, shard=1 << 17):
+  """Reference: BFMatcher(NORM_HAMMING).knnMatch as (ids, distances) arrays."""
+  ids, dists = [], []
+  for s in range(0, len(gallery), shard): # BFMatcher caps the rows of one train set
+    out = cv2.BFMatcher(cv2.NORM_HAMMING).knnMatch(query, gallery[s:s + shard], k=k)
+    ids.append(np.array([[m.trainIdx + s for m in ms] for ms in out]))
+    dists.append(np.array([[m.distance for m in ms] for ms in out], np.int32))
+  ids, dists = np.concatenate(ids, axis=1), np.concatenate(dists, axis=1)
+  order = np.argsort(dists, axis=1, kind='stable')[:, :k]
+  return np.take_along_axis(ids, order, 1), np.take_along_axis(dists, order, 1)
+
+
+if __name__ == '__main__':
+  import tempfile
+  rng = np.random.default_rng(0)
+  orb = cv2.ORB_create(nfeatures=5000)
+  real = []
+  for name in ('tree_img.jpg', 'shapes.jpg', 'chessboard.png', 'test_img.png', 'faces.jpg', 'edge_img.jpg', 'noisy_img.png'):
+    img = cv2.imread(name, cv2.IMREAD_GRAYSCALE)
+    for s in (1.0, 0.7, 1.4):
+      des = orb.detectAndCompute(cv2.resize(img, None, fx=s, fy=s), None)[1]
+      if des is not None:
+        real.append(des)
+  real = np.concatenate(real)
+  # Queries: the tree photo seen again, rotated, rescaled and noisier -- true matches live in the gallery
+  tree = cv2.imread('tree_img.jpg', cv2.IMREAD_GRAYSCALE)
+  h, w = tree.shape
+  moved = cv2.warpAffine(tree, cv2.getRotationMatrix2D((w / 2, h / 2), 8, 0.9), (w, h))
+  moved = cv2.add(moved, rng.integers(0, 12, moved.shape, np.uint8))
+  query = orb.detectAndCompute(moved, None)[1][:500]
+  print(f'{len(real)} real ORB descriptors, {len(query)} queries')
+
+  print(f"\n{'gallery':>9}{'radius':>7}{'build':>9}{'BF q/s':>9}{'index q/s':>11}{'R@1':>8}{'R@2':>8}{'ratio-test agree':>18}")
+  for n, radii in ((100_000, (0, 1)), (1_000_000, (0,))):
+    # Distractors: real descriptors with a quarter of their bits flipped, so they are ORB-like, not uniform
+    src = real[rng.integers(0, len(real), n - len(real))]
+    noise = np.packbits(rng.integers(0, 4, (len(src), BITS), np.uint8) == 0, axis=1)
+    gallery = np.concatenate([real, src ^ noise])
+    del src, noise
+    t0 = time.perf_counter()
+    bf_ids, bf_d = bf_knn(gallery, query)
+    bf_qps = len(query) / (time.perf_counter() - t0)
+    bf_ok = bf_d[:, 0] < 0.8 * bf_d[:, 1]
+    for radius in radii:
+      t0 = time.perf_counter()
+      idx = HammingIndex(radius)
+      idx.add(gallery)
+      build = time.perf_counter() - t0
+      t0 = time.perf_counter()
+      ids, d = idx.knn(query, 2)
+      qps = len(query) / (time.perf_counter() - t0)
+      # By distance, so ties between equally near neighbours count as found
+      r1, r2 = np.mean(d[:, 0] == bf_d[:, 0]), np.mean(d == bf_d)
+      q, t, _ = idx.match(query, 0.8)
+      ours = set(zip(q.tolist(), t.tolist()))
+      agree = np.mean([(i, bf_ids[i, 0]) in ours for i in np.flatnonzero(bf_ok)]) # of BF's ratio-test matches
+      print(f'{n:9d}{radius:7d}{build:8.2f}s{bf_qps:9.0f}{qps:11.0f}{r1:8.1%}{r2:8.1%}{agree:18.1%}')
+
+  with tempfile.TemporaryDirectory() as tmp:
+    idx.save(tmp)
+    t0 = time.perf_counter()
+    mapped = HammingIndex.load(tmp)
+    t1 = time.perf_counter()
+    same = np.array_equal(mapped.knn(query, 2)[1], d)
+    print(f'\nsaved {sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)) / 2**20:.0f} MB,'
+          f' mmap load {(t1 - t0) * 1e3:.1f} ms, first queries {(time.perf_counter() - t1) * 1e3:.0f} ms, identical results: {same}')
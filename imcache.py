@@ -0,0 +1,167 @@
+"""
+Decoded Image Cache
+- Overview: Drop-in `imread` that keeps decoded arrays as memory-mapped .npy files keyed by the source file's content hash, plus a size-bounded in-process LRU.
+- Inputs: Any image path `cv2.imread` understands. Cache directory from $CV_CACHE_DIR (default `.imcache` next to this file), capped at $CV_CACHE_MAX_BYTES (default 2 GB) with least-recently-used files evicted first.
+- Usage: `import imcache; img = imcache.imread('test_img.png')`. Returned arrays are read-only; `.copy()` before drawing on them.
+"""
+
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+DEFAULT_DIR = os.environ.get('CV_CACHE_DIR', str(Path(__file__).resolve().parent / '.imcache'))
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = int(os.environ.get('CV_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+
+def _mapped(npy):
+  # Plain ndarray view over the memmap, so callers see the same type cv2.imread returns
+  return np.load(npy, mmap_mode='r').view(np.ndarray)
+
+
+class ImageCache:
+  def __init__(self, cache_dir=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+    self.cache_dir = Path(cache_dir)
+    self.max_bytes = max_bytes
+    self.max_disk_bytes = max_disk_bytes
+    self._lru = collections.OrderedDict() # (path, mtime, size, flags) -> array
+    self._files = {} # (path, flags) -> (key, .npy) last seen, to drop entries of files that changed
+    self._bytes = 0
+    self._lock = threading.Lock()
+    self.hits = self.disk_hits = self.misses = 0
+
+  def imread(self, path, flags=cv2.IMREAD_COLOR, disk=True):
+    """Like `cv2.imread`: returns None when the file is missing or can't be decoded.
+
+    disk=False keeps the result in the in-process LRU only (for one-off reads such as the
+    frames of a long image sequence, which would otherwise fill the cache directory).
+    """
+    path = os.path.abspath(path)
+    try:
+      st = os.stat(path)
+    except OSError:
+      return None
+    # A changed file gets a new mtime/size, so stale entries simply stop being hit
+    key = (path, st.st_mtime_ns, st.st_size, flags)
+    with self._lock:
+      img = self._lru.get(key)
+      if img is not None:
+        self._lru.move_to_end(key)
+        self.hits += 1
+        return img
+
+    if not disk:
+      img = cv2.imread(path, flags)
+      if img is None:
+        return None
+      self.misses += 1
+      img.flags.writeable = False # same contract as the cached arrays
+      self._remember(key, img)
+      return img
+
+    data = np.fromfile(path, np.uint8)
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    npy = self.cache_dir / f'{digest}_{flags}.npy'
+    try:
+      img = _mapped(npy) # zero-copy: pages come straight from the OS cache
+      self.disk_hits += 1
+    except (OSError, ValueError):
+      img = cv2.imdecode(data, flags)
+      if img is None:
+        return None
+      self.misses += 1
+      img = self._store(npy, img)
+    else:
+      try:
+        os.utime(npy) # mtime doubles as the last-use time for disk eviction
+      except OSError:
+        pass # read-only cache dir: still a hit, eviction order just goes stale
+    self._forget_stale(path, flags, key, npy)
+    self._remember(key, img)
+    return img
+
+  def _forget_stale(self, path, flags, key, npy):
+    # The file changed since we last read it: its old decoded copy will never be hit again
+    with self._lock:
+      old = self._files.get((path, flags))
+      self._files[(path, flags)] = (key, npy)
+      if old is None or old[0] == key:
+        return
+      img = self._lru.pop(old[0], None)
+      if img is not None:
+        self._bytes -= img.nbytes
+      # Content-addressed: another path with the same bytes may still point at the old file
+      shared = any(v[1] == old[1] for v in self._files.values())
+    if old[1] != npy and not shared:
+      try:
+        old[1].unlink()
+      except OSError:
+        pass
+
+  def _store(self, npy, img):
+    # Write to a temp file and rename, so concurrent units never see half an array
+    tmp = None
+    try:
+      self.cache_dir.mkdir(parents=True, exist_ok=True)
+      fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.npy.tmp')
+      with os.fdopen(fd, 'wb') as f:
+        np.save(f, img)
+      os.replace(tmp, npy)
+      self._evict_disk(keep=npy)
+    except OSError:
+      if tmp and os.path.exists(tmp):
+        os.unlink(tmp)
+      img.flags.writeable = False # unwritable cache dir: still serve the decoded array
+      return img
+    return _mapped(npy)
+
+  def _evict_disk(self, keep=None):
+    """Delete least-recently-used .npy files until the directory fits `max_disk_bytes`."""
+    files = []
+    for f in self.cache_dir.glob('*.npy'):
+      try:
+        st = f.stat()
+      except OSError: # removed by another process meanwhile
+        continue
+      files.append((st.st_mtime_ns, st.st_size, f))
+    total = sum(size for _, size, _ in files)
+    for _, size, f in sorted(files):
+      if total <= self.max_disk_bytes:
+        break
+      if f == keep:
+        continue
+      try:
+        f.unlink() # mapped arrays stay valid: the pages live until they are unmapped
+      except OSError:
+        continue
+      total -= size
+
+  def _remember(self, key, img):
+    with self._lock:
+      if key in self._lru:
+        return
+      self._lru[key] = img
+      self._bytes += img.nbytes
+      while self._bytes > self.max_bytes and len(self._lru) > 1:
+        _, old = self._lru.popitem(last=False)
+        self._bytes -= old.nbytes
+
+  def clear(self, disk=False):
+    with self._lock:
+      self._lru.clear()
+      self._files.clear()
+      self._bytes = 0
+    if disk and self.cache_dir.is_dir():
+      for f in self.cache_dir.glob('*.npy'):
+        f.unlink()
+
+
+_default = ImageCache()
+imread = _default.imread
+clear = _default.clear
@@ -0,0 +1,134 @@
+"""
+Stage Latency Histograms
+- Overview: Per-stage and per-frame latency for live loops, kept in fixed log-spaced histograms so p50/p95/p99 cost O(1) memory; optional on-frame overlay and periodic JSON/CSV dumps.
+- Inputs: Stage names of your choosing. $CV_LATENCY_DUMP (a .json or .csv path) turns on periodic dumps.
+- Usage: `lat = latency.StageTimer()`; per frame call `lat.start_frame()`, `lat.lap('capture')` after each stage, then `lat.end_frame()`.
+"""
+
+import csv
+import json
+import math
+import os
+import time
+
+import cv2
+
+DEFAULT_DUMP = os.environ.get('CV_LATENCY_DUMP')
+
+
+class Histogram:
+  """Log-spaced latency buckets from `lo` to `hi` seconds.
+
+  One thread writes (the loop that owns it); readers only ever copy the count list,
+  so there is no lock on the hot path.
+  """
+
+  def __init__(self, lo=1e-5, hi=10.0, per_decade=20):
+    self.lo = lo
+    self.per_decade = per_decade
+    self.n_buckets = int(math.ceil(math.log10(hi / lo) * per_decade)) + 1
+    self.counts = [0] * self.n_buckets
+    self.count = 0
+    self.max = 0.0
+    self._scale = per_decade / math.log(10)
+
+  def record(self, seconds):
+    i = int(math.log(seconds / self.lo) * self._scale) + 1 if seconds > self.lo else 0
+    self.counts[min(i, self.n_buckets - 1)] += 1
+    self.count += 1
+    if seconds > self.max:
+      self.max = seconds
+
+  def upper_edge(self, i):
+    return self.lo * 10 ** (i / self.per_decade)
+
+  def percentile(self, q, counts=None):
+    """Upper bound of the bucket holding the q-th percentile (q in 0..100), in seconds."""
+    counts = counts if counts is not None else list(self.counts)
+    total = sum(counts)
+    if not total:
+      return 0.0
+    rank = q / 100 * total
+    seen = 0
+    for i, c in enumerate(counts):
+      seen += c
+      if seen >= rank:
+        return min(self.upper_edge(i), self.max)
+    return self.max
+
+  def summary(self):
+    counts = list(self.counts) # snapshot; the writer can keep going
+    return {
+      'count': sum(counts),
+      'p50_ms': self.percentile(50, counts) * 1e3,
+      'p95_ms': self.percentile(95, counts) * 1e3,
+      'p99_ms': self.percentile(99, counts) * 1e3,
+      'max_ms': self.max * 1e3,
+    }
+
+
+class StageTimer:
+  """Lap timer feeding one Histogram per stage plus one for the whole frame."""
+
+  def __init__(self, dump_path=DEFAULT_DUMP, dump_every=5.0):
+    self.hists = {}
+    self.frame_hist = Histogram()
+    self.dump_path = dump_path
+    self.dump_every = dump_every
+    self._frame_start = self._last = None
+    self._next_dump = time.perf_counter() + dump_every
+
+  def start_frame(self):
+    self._frame_start = self._last = time.perf_counter()
+
+  def lap(self, stage):
+    """Record the time since the previous lap (or frame start) under `stage`."""
+    now = time.perf_counter()
+    h = self.hists.get(stage)
+    if h is None:
+      h = self.hists[stage] = Histogram()
+    h.record(now - self._last)
+    self._last = now
+
+  def end_frame(self):
+    now = time.perf_counter()
+    self.frame_hist.record(now - self._frame_start)
+    if self.dump_path and now >= self._next_dump:
+      self.dump()
+      self._next_dump = now + self.dump_every
+
+  def summary(self):
+    out = {name: h.summary() for name, h in self.hists.items()}
+    out['frame'] = self.frame_hist.summary()
+    return out
+
+  def draw(self, img, org=(10, 60), color=(0, 255, 255)):
+    """Overlay one 'stage p50/p95/p99' line per stage onto `img`."""
+    x, y = org
+    for name, s in self.summary().items():
+      text = f"{name}: {s['p50_ms']:.1f}/{s['p95_ms']:.1f}/{s['p99_ms']:.1f} ms"
+      cv2.putText(img, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+      y += 20
+    return img
+
+  def dump(self, path=None):
+    path = path or self.dump_path
+    stamp = time.time()
+    summary = self.summary()
+    if str(path).endswith('.csv'): # append rows, so the file is a time series
+      new = not os.path.exists(path)
+      with open(path, 'a', newline='') as f:
+        w = csv.writer(f)
+        if new:
+          w.writerow(['time', 'stage', 'count', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+        for name, s in summary.items():
+          w.writerow([f'{stamp:.3f}', name, s['count']] + [f"{s[k]:.3f}" for k in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')])
+    else: # latest snapshot, replaced atomically
+      tmp = f'{path}.tmp'
+      with open(tmp, 'w') as f:
+        json.dump({'time': stamp, 'stages': summary}, f, indent=2)
+      os.replace(tmp, path)
+
+  def report(self):
+    for name, s in self.summary().items():
+      print(f"{name:<10} n={s['count']:<6} p50={s['p50_ms']:.2f}ms p95={s['p95_ms']:.2f}ms p99={s['p99_ms']:.2f}ms max={s['max_ms']:.2f}ms")
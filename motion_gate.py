@@ -0,0 +1,218 @@
+"""
+Motion Gate (Unit 6 live loops on fixed cameras)
+- Overview: Difference a downsampled frame against the last processed one, tile by tile, so per-pixel stages (HSV masking, bitwise ops) rerun only on the tiles that changed and reuse their cached output everywhere else, and whole-frame stages (contours) run only on frames that changed at all.
+- Inputs: BGR or grayscale frames of a fixed size; tile size a multiple of the downsample factor.
+- Usage: `gate = motion_gate.MotionGate()`; `masker = gate.stage(lambda f: lut.mask(f, 'red'))`;
+    per frame `dirty = gate.update(frame)`, then `mask = masker(frame)`; `gate.stats()` for the skip ratio and time saved.
+  Run `python motion_gate.py` for a benchmark on a mostly static synthetic scene.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+  def __init__(self, tile=64, threshold=6, scale=4):
+    self.tile = tile # px, square, in full-resolution frame coords
+    self.threshold = threshold # max abs per-channel difference (on the downsampled frame) that still counts as unchanged
+    self.scale = scale # downsample factor before differencing; also smooths sensor noise
+    self.dirty = None # bool (tiles_y, tiles_x) for the current frame
+    self._ref = None # downsampled copy of what the cached outputs were computed from
+    self.frame_shape = self._regions = None # shape of the frames passed to update()
+    self._stages = []
+    self.frames = self.skipped_frames = 0
+    self.tiles_total = self.tiles_dirty = 0
+    self.gate_seconds = 0.0
+
+  def _alloc(self, frame):
+    h, w = frame.shape[:2]
+    sh, sw = -(-h // self.scale), -(-w // self.scale)
+    ty, tx = -(-h // self.tile), -(-w // self.tile)
+    st = self.tile // self.scale
+    # Power-of-two scales go down in 2x INTER_AREA steps: OpenCV's SIMD path for exact halving
+    # is ~4x cheaper than one 4x INTER_AREA resize and gives the same averages (+-1 rounding)
+    steps = []
+    if self.scale & (self.scale - 1) == 0:
+      f = 2
+      while f <= self.scale:
+        steps.append((-(-w // f), -(-h // f)))
+        f *= 2
+    else:
+      steps.append((sw, sh))
+    self._steps = [(size, np.empty((size[1], size[0]) + frame.shape[2:], np.uint8)) for size in steps]
+    self._small = self._steps[-1][1]
+    self._pad = np.zeros((ty * st, tx * st) + frame.shape[2:], np.uint8) # diff; ragged right/bottom tiles stay 0
+    self._tile_max = np.empty((ty, tx), np.uint8)
+    self._up = np.empty((ty * st, tx * st), np.uint8) # dirty tiles at small-image resolution
+    self.frame_shape = frame.shape
+
+  def update(self, frame):
+    """Mark the tiles of `frame` that differ from the last processed frame; returns the bool tile grid."""
+    t0 = time.perf_counter()
+    fresh = self._ref is None or self.frame_shape != frame.shape
+    if fresh:
+      self._alloc(frame)
+    # One small-image pixel per scale x scale block, tiles a whole number of small pixels.
+    # Per channel, not gray: a red object on a background of the same brightness still counts
+    small = frame
+    for size, buf in self._steps:
+      small = cv2.resize(small, size, dst=buf, interpolation=cv2.INTER_AREA)
+    sh, sw = small.shape[:2]
+    ty, tx = self._tile_max.shape
+    self._regions = None
+    if fresh:
+      self._ref = small.copy()
+      self.dirty = np.ones((ty, tx), bool)
+      for s in self._stages:
+        s.reset()
+    else:
+      st = self.tile // self.scale
+      cv2.absdiff(small, self._ref, dst=self._pad[:sh, :sw])
+      np.max(self._pad.reshape(ty, st, tx, -1), axis=(1, 3), out=self._tile_max)
+      self.dirty = self._tile_max > self.threshold
+      # Only dirty tiles move the reference: slow drift accumulates until it crosses the threshold
+      cv2.resize(self.dirty.view(np.uint8), (tx * st, ty * st), dst=self._up, interpolation=cv2.INTER_NEAREST)
+      cv2.copyTo(small, self._up[:sh, :sw], self._ref)
+    self.frames += 1
+    self.tiles_total += self.dirty.size
+    n = int(np.count_nonzero(self.dirty))
+    self.tiles_dirty += n
+    self.skipped_frames += n == 0
+    self.gate_seconds += time.perf_counter() - t0
+    return self.dirty
+
+  @property
+  def frame_dirty(self):
+    return self.dirty is None or bool(self.dirty.any())
+
+  def regions(self):
+    """Dirty area as (y0, y1, x0, x1) rectangles: runs of dirty tiles along each tile row."""
+    if self._regions is None:
+      edges = np.diff(np.pad(self.dirty.view(np.int8), ((0, 0), (1, 1))), axis=1) # +1 where a run starts, -1 past its end
+      ys, x0s = np.nonzero(edges == 1)
+      x1s = np.nonzero(edges == -1)[1] # row-major order, so starts and ends pair up
+      t = self.tile
+      self._regions = list(zip((ys * t).tolist(), ((ys + 1) * t).tolist(), (x0s * t).tolist(), (x1s * t).tolist()))
+    return self._regions
+
+  def stage(self, fn, per_pixel=True, dst=False):
+    """Wrap `fn(*images) -> image` so it only recomputes what the gate marks dirty.
+
+    per_pixel=True: output pixels depend only on the same input pixels (masks, bitwise ops),
+    so dirty rectangles are recomputed and pasted into the cached output. False: the whole
+    output is recomputed on any change (contours, anything with a neighbourhood).
+    The images may be an integer multiple of the gated frame's size (e.g. full resolution
+    while the gate watches a pyrDown level): dirty rectangles are scaled to match.
+    dst=True: `fn(*images, dst=...)` writes into the cached output (or the dirty rectangle of
+    it) instead of returning a new array, so nothing is allocated after the first frame.
+    """
+    s = GatedStage(self, fn, per_pixel, dst)
+    self._stages.append(s)
+    return s
+
+  def stats(self):
+    saved = sum(s.saved_seconds() for s in self._stages)
+    return {
+      'frames': self.frames,
+      'skipped_frames': self.skipped_frames,
+      'skip_ratio': 1 - self.tiles_dirty / self.tiles_total if self.tiles_total else 0.0,
+      'gate_ms': self.gate_seconds * 1e3,
+      'stage_ms': sum(s.seconds for s in self._stages) * 1e3,
+      'saved_ms': (saved - self.gate_seconds) * 1e3, # net of the gate's own cost
+    }
+
+
+class GatedStage:
+  def __init__(self, gate, fn, per_pixel=True, dst=False):
+    self.gate = gate
+    self.fn = fn
+    self.per_pixel = per_pixel
+    self.dst = dst # fn takes dst=: results go straight into self.out
+    self.seconds = 0.0 # time actually spent in fn
+    self.pixels = 0 # pixels actually computed
+    self.offered_pixels = 0 # pixels we were asked for
+    # Cost model for saved_seconds: steady-state full-frame runs only. The very first run pays
+    # for warm-up (allocations, caches) and would inflate what a skipped pixel is worth
+    self.cold_seconds = self.cold_pixels = 0
+    self.warm_seconds = self.warm_pixels = 0
+    self.reset()
+
+  def reset(self):
+    self.out = None
+
+  def __call__(self, *images):
+    gate = self.gate
+    h, w = images[0].shape[:2]
+    self.offered_pixels += h * w
+    t0 = time.perf_counter()
+    # Until there is one warm full-frame timing, run whole frames (once, right after the cold one)
+    if (self.out is None or not self.warm_pixels or gate.dirty is None or gate.dirty.all()
+        or (not self.per_pixel and gate.frame_dirty)):
+      reuse = self.dst and self.out is not None and self.out.shape[:2] == (h, w)
+      self.out = self.fn(*images, dst=self.out) if reuse else self.fn(*images)
+      dt = time.perf_counter() - t0
+      if self.cold_pixels:
+        self.warm_seconds += dt
+        self.warm_pixels += h * w
+      else:
+        self.cold_seconds, self.cold_pixels = dt, h * w
+      self.pixels += h * w
+      self.seconds += dt
+      return self.out
+    if self.per_pixel:
+      z = max(1, round(h / gate.frame_shape[0])) # 1, or the pyramid factor between the images and the gated frame
+      for y0, y1, x0, x1 in gate.regions():
+        y0, y1, x0, x1 = y0 * z, y1 * z, x0 * z, x1 * z
+        if self.dst:
+          region = self.fn(*(im[y0:y1, x0:x1] for im in images), dst=self.out[y0:y1, x0:x1])
+        else:
+          region = self.fn(*(im[y0:y1, x0:x1] for im in images))
+          self.out[y0:y1, x0:x1] = region
+        self.pixels += region.shape[0] * region.shape[1]
+    self.seconds += time.perf_counter() - t0
+    return self.out
+
+  def saved_seconds(self):
+    """Ungated cost at the steady-state per-pixel rate minus what we spent, both without the cold first run."""
+    if not self.warm_pixels:
+      return 0.0
+    per_pixel = self.warm_seconds / self.warm_pixels
+    return (self.offered_pixels - self.cold_pixels) * per_pixel - (self.seconds - self.cold_seconds)
+
+
+if __name__ == '__main__':
+  import color_lut
+  import sources
+  # A fixed camera on an empty scene: sensor noise everywhere, a small red disc moving
+  src = sources.SyntheticSource(1280, 720, 30, 'red_ball', frames=300)
+  rng = np.random.default_rng(0)
+  frames = []
+  while True:
+    ok, f = src.read()
+    if not ok:
+      break
+    frames.append(cv2.add(f, rng.integers(0, 4, f.shape, np.uint8)))
+  lut = color_lut.ColorLUT(color_lut.RED)
+  masker = lambda f: lut.mask(f, 'red')
+  contours = lambda m: cv2.drawContours(np.zeros_like(m), cv2.findContours(m, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0], -1, 255, 2)
+
+  t0 = time.perf_counter()
+  ref = [contours(masker(f)) for f in frames]
+  ungated_ms = (time.perf_counter() - t0) / len(frames) * 1e3
+
+  gate = MotionGate()
+  gated_mask, gated_contours = gate.stage(masker), gate.stage(contours, per_pixel=False)
+  t0 = time.perf_counter()
+  same = True
+  for f, r in zip(frames, ref):
+    gate.update(f)
+    same &= np.array_equal(gated_contours(gated_mask(f)), r)
+  gated_ms = (time.perf_counter() - t0) / len(frames) * 1e3
+  s = gate.stats()
+  # Sensor noise stays under the threshold, so only tiles the disc crosses are recomputed;
+  # the outputs still match because the red mask ignores that noise too
+  print(f"720p mask+contours, {len(frames)} frames: ungated {ungated_ms:.2f} ms/frame | gated {gated_ms:.2f} ms/frame"
+        f" (gate {s['gate_ms'] / len(frames):.2f}) | skip ratio {s['skip_ratio']:.1%} | saved {s['saved_ms']:.0f} ms"
+        f" | identical: {same}")
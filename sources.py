@@ -0,0 +1,191 @@
+"""
+Frame Sources
+- Overview: Camera-free stand-ins for `cv2.VideoCapture` with the same `read()` contract: a deterministic synthetic generator, a looping video file, and an image-sequence directory.
+- Inputs: A source spec, from the caller or $CV_SOURCE (default '0', the webcam). Examples:
+    '0'                                                      webcam index 0
+    'synthetic?size=1280x720&fps=60&motion=red_ball&frames=600'
+    'clip.mp4?loop=1&frames=900'                              looping video file
+    'frames/?fps=30'  or  'frames/*.png'                      image sequence
+  An explicit fps= paces reads to that rate (like a camera); without it, or with realtime=0, frames come as fast as
+  they are read. An unpaced source behind ThreadedCapture(policy='latest') outruns the loop, so most frames are dropped.
+- Usage: `cap = sources.open_source()`; then `ret, frame = cap.read()` as with VideoCapture.
+"""
+
+import glob
+import os
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+import cv2
+import numpy as np
+
+import imcache
+
+MOTIONS = ('static', 'red_ball', 'noise')
+
+
+class _Source:
+  """Shared bookkeeping: frame limit, optional real-time pacing, VideoCapture-style props."""
+
+  def __init__(self, width, height, fps, frames=None, realtime=False):
+    self.width, self.height, self.fps = width, height, fps
+    self.frames = frames
+    self.realtime = realtime
+    self.index = 0
+    self._opened = True
+    self._t0 = None
+
+  def _pace(self):
+    if not self.realtime or not self.fps:
+      return
+    if self._t0 is None:
+      self._t0 = time.perf_counter()
+    delay = self._t0 + self.index / self.fps - time.perf_counter()
+    if delay > 0:
+      time.sleep(delay)
+
+  def read(self, image=None):
+    if not self._opened or (self.frames is not None and self.index >= self.frames):
+      return False, None
+    self._pace()
+    ok, image = self._next(image)
+    if ok:
+      self.index += 1
+    return ok, image
+
+  def grab(self):
+    return self.read()[0]
+
+  def isOpened(self):
+    return self._opened
+
+  def get(self, prop):
+    return {
+      cv2.CAP_PROP_FRAME_WIDTH: self.width,
+      cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+      cv2.CAP_PROP_FPS: self.fps,
+      cv2.CAP_PROP_POS_FRAMES: self.index,
+      cv2.CAP_PROP_FRAME_COUNT: self.frames if self.frames is not None else -1,
+    }.get(prop, 0.0)
+
+  def set(self, prop, value):
+    return False # fixed-format sources; mirrors a camera rejecting a setting
+
+  def release(self):
+    self._opened = False
+
+
+def _out(image, shape):
+  # Reuse the caller's buffer when it fits, as VideoCapture.read(image) does
+  if image is not None and image.shape == shape and image.dtype == np.uint8:
+    return image
+  return np.empty(shape, np.uint8)
+
+
+class SyntheticSource(_Source):
+  """Frames are a pure function of the frame index, so every run sees identical pixels.
+
+  motion='red_ball' draws a saturated red disc on a Lissajous path over a low-saturation
+  background, which the Unit 6 red tracker picks up; 'noise' is seeded per frame.
+  """
+
+  def __init__(self, width=640, height=480, fps=30, motion='red_ball', frames=None, realtime=False, seed=0):
+    if motion not in MOTIONS:
+      raise ValueError(f'motion must be one of {MOTIONS}, got {motion!r}')
+    super().__init__(width, height, fps, frames, realtime)
+    self.motion = motion
+    self.seed = seed
+    ramp = np.linspace(40, 200, height, dtype=np.float32)[:, None]
+    self._background = np.repeat(np.broadcast_to(ramp, (height, width))[..., None], 3, axis=2).astype(np.uint8)
+    self._background[..., 0] = np.clip(self._background[..., 0].astype(int) + 20, 0, 255) # slight blue cast
+    self._radius = max(4, min(width, height) // 12)
+
+  def ball_center(self, index):
+    t = index / (self.fps or 30)
+    cx = self.width / 2 + 0.4 * self.width * np.sin(2 * np.pi * 0.25 * t)
+    cy = self.height / 2 + 0.35 * self.height * np.sin(2 * np.pi * 0.35 * t + 0.5)
+    return int(cx), int(cy)
+
+  def _next(self, image):
+    frame = _out(image, self._background.shape)
+    if self.motion == 'noise':
+      frame[...] = np.random.default_rng((self.seed, self.index)).integers(0, 256, frame.shape, np.uint8)
+      return True, frame
+    np.copyto(frame, self._background)
+    if self.motion == 'red_ball':
+      cv2.circle(frame, self.ball_center(self.index), self._radius, (20, 20, 220), -1)
+    return True, frame
+
+
+class VideoFileSource(_Source):
+  """A video file that rewinds at the end (loop=True) until `frames` have been read."""
+
+  def __init__(self, path, loop=True, frames=None, realtime=False):
+    self.cap = cv2.VideoCapture(str(path))
+    if not self.cap.isOpened():
+      raise IOError(f'could not open video {path}')
+    super().__init__(int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                     self.cap.get(cv2.CAP_PROP_FPS) or 30.0, frames, realtime)
+    self.loop = loop
+
+  def _next(self, image):
+    ok, frame = self.cap.read(image) if image is not None else self.cap.read()
+    if not ok and self.loop and self.index > 0:
+      self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+      ok, frame = self.cap.read(image) if image is not None else self.cap.read()
+    return ok, frame
+
+  def release(self):
+    super().release()
+    self.cap.release()
+
+
+class ImageSequenceSource(_Source):
+  """Sorted images from a directory or glob, decoded through imcache's in-memory LRU (never its disk cache:
+  a long sequence would write a decoded .npy per frame), then copied per read."""
+
+  def __init__(self, pattern, fps=30.0, loop=True, frames=None, realtime=False):
+    p = Path(pattern)
+    paths = sorted(str(q) for q in p.iterdir() if q.is_file()) if p.is_dir() else sorted(glob.glob(str(pattern)))
+    self.paths = [q for q in paths if cv2.haveImageReader(q)]
+    if not self.paths:
+      raise IOError(f'no images found for {pattern}')
+    first = imcache.imread(self.paths[0], disk=False)
+    super().__init__(first.shape[1], first.shape[0], fps, frames, realtime)
+    self.loop = loop
+
+  def _next(self, image):
+    i = self.index
+    if i >= len(self.paths):
+      if not self.loop:
+        return False, None
+      i %= len(self.paths)
+    img = imcache.imread(self.paths[i], disk=False)
+    if img is None:
+      return False, None
+    frame = _out(image, img.shape)
+    np.copyto(frame, img) # cached arrays are read-only; hand out a writable frame
+    return True, frame
+
+
+def open_source(spec=None):
+  """Build a source from a spec string (see module docstring); falls back to $CV_SOURCE, then '0'."""
+  if spec is None:
+    spec = os.environ.get('CV_SOURCE', '0')
+  spec = str(spec)
+  if spec.isdigit():
+    return cv2.VideoCapture(int(spec))
+  target, _, query = spec.partition('?')
+  opts = dict(parse_qsl(query))
+  frames = int(opts['frames']) if 'frames' in opts else None
+  # Asking for a frame rate means wanting it: pace unless realtime=0 says otherwise
+  realtime = opts.get('realtime', '1' if 'fps' in opts else '0') not in ('0', 'false', '')
+  if target == 'synthetic':
+    w, h = (int(v) for v in opts.get('size', '640x480').split('x'))
+    return SyntheticSource(w, h, float(opts.get('fps', 30)), opts.get('motion', 'red_ball'), frames,
+                           realtime, int(opts.get('seed', 0)))
+  loop = opts.get('loop', '1') not in ('0', 'false')
+  if Path(target).is_dir() or any(c in target for c in '*['):
+    return ImageSequenceSource(target, float(opts.get('fps', 30)), loop, frames, realtime)
+  return VideoFileSource(target, loop, frames, realtime)
@@ -0,0 +1,199 @@
+"""
+Async Video Writer
+- Overview: `cv2.VideoWriter` behind a bounded queue, with encoding on a background thread, backpressure policies, segment rotation every `segment_seconds` of recorded video, and FPS measured from frame timestamps when the camera reports 0.
+- Inputs: Frames (BGR or single-channel) passed to `write()`, optionally with their capture timestamps.
+- Usage: `out = video_writer.AsyncVideoWriter('rec.mp4', fps=None, policy='block')`; `out.write(frame)`; `out.release()`; `out.stats()`.
+  Policies when the queue is full: 'block' waits, 'drop' discards the new frame, 'degrade' discards its pixels but re-encodes the previous frame in its place, so the recording keeps its length at lower fidelity.
+  `write()` copies each frame into a ring of buffers the encoder hands back, so steady-state writes allocate nothing; copy=False queues the caller's array as is.
+"""
+
+import collections
+import queue
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from latency import Histogram
+
+POLICIES = ('block', 'drop', 'degrade')
+_STOP = object()
+
+
+class AsyncVideoWriter:
+  def __init__(self, path, fourcc='mp4v', fps=None, frame_size=None, is_color=None, queue_size=64,
+               policy='block', segment_seconds=None, fps_probe_frames=30, copy=True):
+    if policy not in POLICIES:
+      raise ValueError(f'policy must be one of {POLICIES}, got {policy!r}')
+    self.path = Path(path)
+    self.fourcc = cv2.VideoWriter_fourcc(*fourcc) if isinstance(fourcc, str) else fourcc
+    self.fps = fps if fps and fps > 0 else None # None: measure it from timestamps
+    self.frame_size = frame_size
+    self.is_color = is_color
+    self.policy = policy
+    self.segment_seconds = segment_seconds
+    self.fps_probe_frames = max(2, fps_probe_frames)
+    self.copy = copy
+
+    self.written = self.dropped = self.repeated = 0
+    self.max_depth = 0
+    self.encode_hist = Histogram()
+    self.segments = []
+    self.error = None
+
+    self._q = queue.Queue(maxsize=queue_size)
+    self._free = collections.deque() # ring of idle frame buffers, handed back by the encoder
+    self.allocations = 0 # frame buffers ever allocated: stops growing once the ring covers the queue depth
+    self._lock = threading.Lock() # guards the repeat count on the newest queued item
+    self._tail = None
+    self._writer = None
+    self._segment_frames = 0 # frames in the open segment, repeats included
+    self._thread = threading.Thread(target=self._run, name='video-writer', daemon=True)
+    self._thread.start()
+
+  # --- producer side ---
+  def write(self, frame, timestamp=None):
+    if self.error:
+      raise IOError(self.error)
+    item = [self._slot(frame) if self.copy else frame, timestamp if timestamp is not None else time.monotonic(), 0, False]
+    if self.policy == 'block':
+      self._q.put(item)
+    else:
+      try:
+        self._q.put_nowait(item)
+      except queue.Full:
+        self._recycle(item[0])
+        self._on_full()
+        return False
+    self._tail = item
+    self.max_depth = max(self.max_depth, self._q.qsize())
+    return True
+
+  def _slot(self, frame):
+    # Copy into a recycled buffer; allocate only while the ring fills up or after a size change
+    try:
+      buf = self._free.pop()
+    except IndexError:
+      buf = None
+    if buf is None or buf.shape != frame.shape or buf.dtype != frame.dtype:
+      buf = np.empty(frame.shape, frame.dtype)
+      self.allocations += 1
+    np.copyto(buf, frame)
+    return buf
+
+  def _recycle(self, buf):
+    if self.copy:
+      self._free.append(buf) # deque append/pop are atomic: no lock between producer and encoder
+
+  def _on_full(self):
+    with self._lock:
+      tail = self._tail
+      if self.policy == 'degrade' and tail is not None and not tail[3]:
+        tail[2] += 1 # the encoder writes the newest queued frame once more
+        return
+    self.dropped += 1
+
+  def queue_depth(self):
+    return self._q.qsize()
+
+  def isOpened(self):
+    return self.error is None
+
+  def release(self):
+    self._q.put(_STOP)
+    self._thread.join()
+    if self.error:
+      raise IOError(self.error)
+
+  # --- encoder side ---
+  def _segment_path(self):
+    if not self.segment_seconds:
+      return self.path
+    return self.path.with_name(f'{self.path.stem}_{len(self.segments):03d}{self.path.suffix}')
+
+  def _open(self, frame):
+    if self._writer is not None:
+      self._writer.release()
+    h, w = frame.shape[:2]
+    size = self.frame_size or (w, h)
+    color = self.is_color if self.is_color is not None else frame.ndim == 3
+    path = self._segment_path()
+    self._writer = cv2.VideoWriter(str(path), self.fourcc, self.fps, size, isColor=color)
+    if not self._writer.isOpened():
+      raise IOError(f'could not open video writer for {path}')
+    self.segments.append(path)
+    self._segment_frames = 0
+
+  def _encode(self, frame, repeats):
+    # Rotate on frames written, not on timestamps: a repeated frame stands in for frames whose
+    # timestamps never reach the encoder, but it still adds 1/fps to the segment's length
+    per_segment = max(1, round(self.segment_seconds * self.fps)) if self.segment_seconds else None
+    for _ in range(1 + repeats):
+      if self._writer is None or (per_segment and self._segment_frames >= per_segment):
+        self._open(frame)
+      t0 = time.perf_counter()
+      self._writer.write(frame)
+      self.encode_hist.record(time.perf_counter() - t0)
+      self._segment_frames += 1
+    self.written += 1
+    self.repeated += repeats
+
+  def _take(self):
+    item = self._q.get()
+    if item is not _STOP:
+      with self._lock:
+        item[3] = True # taken: later repeats go to a newer frame or count as drops
+    return item
+
+  def _run(self):
+    probe = []
+    stopped = False
+    try:
+      while True:
+        item = self._take()
+        if item is _STOP:
+          stopped = True
+          break
+        if self.fps is None: # hold the first frames until their timestamps give us a rate
+          probe.append(item)
+          if len(probe) < self.fps_probe_frames:
+            continue
+          self.fps = _fps_from(probe)
+          for frame, _, repeats, _ in probe:
+            self._encode(frame, repeats)
+            self._recycle(frame)
+          probe = []
+          continue
+        self._encode(item[0], item[2])
+        self._recycle(item[0])
+      if probe: # short recording: estimate from what we have
+        self.fps = _fps_from(probe)
+        for frame, _, repeats, _ in probe:
+          self._encode(frame, repeats)
+    except Exception as e:
+      self.error = str(e)
+      while not stopped: # keep draining so blocked producers see the error on their next write()
+        stopped = self._q.get() is _STOP
+    finally:
+      if self._writer is not None:
+        self._writer.release()
+
+  def stats(self):
+    s = self.encode_hist.summary()
+    return {
+      'written': self.written, 'dropped': self.dropped, 'repeated': self.repeated,
+      'queue_depth': self.queue_depth(), 'max_queue_depth': self.max_depth, 'allocations': self.allocations,
+      'fps': self.fps, 'segments': [str(p) for p in self.segments],
+      'encode_ms': {k: s[k] for k in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')},
+    }
+
+
+def _fps_from(items, default=30.0):
+  # Median frame interval is robust to the odd stall at startup
+  stamps = sorted(ts for _, ts, _, _ in items)
+  gaps = sorted(b - a for a, b in zip(stamps, stamps[1:]) if b > a)
+  if not gaps:
+    return default
+  return min(max(1.0 / gaps[len(gaps) // 2], 1.0), 240.0)
@@ -0,0 +1,149 @@
+"""
+Cached Warp Maps (Unit 5 on video)
+- Overview: For a fixed homography (e.g. the cv06 "unskew" of a fixed-mount camera), compute the per-pixel inverse mapping once, keep it as `cv2.remap` maps (float32, or fixed-point CV_16SC2 with `fixed_point=True`) in an LRU, optionally persisted to disk, so every later frame costs one remap pass.
+- Inputs: Frames of a fixed size, a 3x3 (or 2x3) matrix, output size and interpolation -- the same arguments as `cv2.warpPerspective`.
+- Usage: `cache = warp_cache.WarpCache(cache_dir='.warpcache')`; per frame `out = cache.warp(frame, M, (300, 300))`; run `python warp_cache.py` for frames/s vs plain `warpPerspective`.
+"""
+
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 8
+
+
+def build_maps(M, dsize, interpolation=cv2.INTER_LINEAR, fixed_point=False):
+  """Source coords for every output pixel: the work warpPerspective redoes on each call."""
+  M = np.asarray(M, np.float64)
+  if M.shape == (2, 3):
+    M = np.vstack([M, [0, 0, 1]])
+  w, h = dsize
+  grid = np.empty((h, w, 2), np.float64)
+  grid[..., 0] = np.arange(w)
+  grid[..., 1] = np.arange(h)[:, None]
+  src = cv2.perspectiveTransform(grid.reshape(1, -1, 2), np.linalg.inv(M)).reshape(h, w, 2)
+  map_x = src[..., 0].astype(np.float32)
+  map_y = src[..., 1].astype(np.float32)
+  if not fixed_point:
+    return map_x, map_y
+  # Integer coords + a 1/32-pixel interpolation-table index: half the memory and a faster
+  # remap, at the cost of that quantisation (OpenCV 5's warpPerspective interpolates in float)
+  nearest = interpolation == cv2.INTER_NEAREST
+  map1, map2 = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2, nninterpolation=nearest)
+  return map1, None if nearest else map2
+
+
+class WarpCache:
+  def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, cache_dir=None, fixed_point=False):
+    self.max_entries = max_entries
+    self.cache_dir = Path(cache_dir) if cache_dir else None
+    self.fixed_point = fixed_point
+    self._lru = collections.OrderedDict() # key -> (map1, map2)
+    self._lock = threading.Lock()
+    self.hits = self.disk_hits = self.misses = 0
+
+  def _key(self, M, src_size, dsize, interpolation):
+    M = np.ascontiguousarray(M, np.float64)
+    return M.tobytes(), M.shape, tuple(src_size), tuple(dsize), interpolation, self.fixed_point
+
+  def maps(self, M, src_size, dsize, interpolation=cv2.INTER_LINEAR):
+    key = self._key(M, src_size, dsize, interpolation)
+    with self._lock:
+      maps = self._lru.get(key)
+      if maps is not None:
+        self._lru.move_to_end(key)
+        self.hits += 1
+        return maps
+
+    path = None
+    if self.cache_dir:
+      digest = hashlib.blake2b(repr(key[1:]).encode() + key[0], digest_size=16).hexdigest()
+      path = self.cache_dir / f'{digest}.npz'
+      maps = self._load(path)
+    if maps is not None:
+      self.disk_hits += 1
+    else:
+      maps = build_maps(M, dsize, interpolation, self.fixed_point)
+      self.misses += 1
+      if path:
+        self._store(path, maps)
+    with self._lock:
+      self._lru[key] = maps
+      while len(self._lru) > self.max_entries:
+        self._lru.popitem(last=False)
+    return maps
+
+  def _load(self, path):
+    try:
+      with np.load(path) as z:
+        return z['map1'], z['map2'] if 'map2' in z else None
+    except (OSError, ValueError, KeyError):
+      return None
+
+  def _store(self, path, maps):
+    # Temp file + rename, so a concurrent reader never loads half a map
+    tmp = None
+    try:
+      self.cache_dir.mkdir(parents=True, exist_ok=True)
+      fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.npz.tmp')
+      with os.fdopen(fd, 'wb') as f:
+        np.savez(f, map1=maps[0], **({} if maps[1] is None else {'map2': maps[1]}))
+      os.replace(tmp, path)
+    except OSError:
+      if tmp and os.path.exists(tmp):
+        os.unlink(tmp) # unwritable cache dir: the in-memory entry still works
+
+  def warp(self, img, M, dsize, interpolation=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=0, dst=None):
+    """`cv2.warpPerspective(img, M, dsize, ...)` as one remap once the maps are cached (float maps match it to rounding)."""
+    map1, map2 = self.maps(M, img.shape[1::-1], dsize, interpolation)
+    return cv2.remap(img, map1, map2, interpolation, dst=dst, borderMode=borderMode, borderValue=borderValue)
+
+  def clear(self, disk=False):
+    with self._lock:
+      self._lru.clear()
+    if disk and self.cache_dir and self.cache_dir.is_dir():
+      for f in self.cache_dir.glob('*.npz'):
+        f.unlink()
+
+
+_default = WarpCache()
+warp = _default.warp
+clear = _default.clear
+
+
+def _fps(fn, frames):
+  t0 = time.perf_counter()
+  for frame in frames:
+    fn(frame)
+  return len(frames) / (time.perf_counter() - t0)
+
+
+if __name__ == '__main__':
+  import sources
+  # cv06's unskew, scaled up to a 720p and a 1080p camera
+  pts1 = np.float32([[56, 65], [368, 52], [28, 387], [389, 390]])
+  pts2 = np.float32([[0, 0], [300, 0], [0, 300], [300, 300]])
+  print(f"{'input':>10}{'output':>10}{'warpPerspective':>17}{'remap float':>13}{'remap 16SC2':>13}{'max diff float/16SC2':>22}")
+  for (w, h), scale in (((1280, 720), 2), ((1920, 1080), 3)):
+    src = sources.SyntheticSource(w, h, 30, 'noise')
+    frames = [src.read()[1] for _ in range(60)]
+    M = cv2.getPerspectiveTransform(pts1 * scale, pts2 * scale)
+    dsize = (300 * scale, 300 * scale)
+    caches = {fp: WarpCache(fixed_point=fp) for fp in (False, True)}
+    t0 = time.perf_counter()
+    caches[True].warp(frames[0], M, dsize)
+    build_ms = (time.perf_counter() - t0) * 1e3
+    fps_plain = _fps(lambda f: cv2.warpPerspective(f, M, dsize), frames)
+    fps_float = _fps(lambda f: caches[False].warp(f, M, dsize), frames)
+    fps_fixed = _fps(lambda f: caches[True].warp(f, M, dsize), frames)
+    diff = [max(int(cv2.norm(cv2.warpPerspective(f, M, dsize), c.warp(f, M, dsize), cv2.NORM_INF)) for f in frames[:5])
+            for c in caches.values()]
+    print(f'{w}x{h:<5}{dsize[0]}x{dsize[1]:<5}{fps_plain:13.0f} fps{fps_float:9.0f} fps{fps_fixed:9.0f} fps{diff[0]:15d} / {diff[1]}'
+          f'   (maps built once in {build_ms:.1f} ms)')